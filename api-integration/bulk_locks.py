@@ -0,0 +1,250 @@
+# api-integration/bulk_locks.py
+"""
+Bulk stack locking for maintenance windows.
+
+Stacks are locked with batched GraphQL mutations (one aliased `stackLock`
+per stack, `batch_size` per request) sent concurrently. A lock set is
+all-or-nothing: if any stack fails to lock, the ones that succeeded are
+unlocked again. Every lock taken here is recorded with a timestamp and the
+API's `lockedBy` in a local ledger so the compliance scanner can report real
+lock ages; an entry only counts while the stack is still locked by that same
+holder.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from models import Stack
+from token_manager import FileLock
+
+DEFAULT_LEDGER = os.environ.get(
+    'SPACELIFT_LOCK_LEDGER',
+    os.path.expanduser('~/.cache/spacelift/locks.json')
+)
+
+
+class BulkLockError(Exception):
+    """Raised when a lock set could not be applied (after rollback)"""
+
+    def __init__(self, message: str, result: 'BulkLockResult'):
+        super().__init__(message)
+        self.result = result
+
+
+@dataclass
+class BulkLockResult:
+    succeeded: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)  # stack_id -> error
+    rolled_back: List[str] = field(default_factory=list)
+    # Stacks whose batch request raised (timeout, 5xx): the mutation may have applied
+    uncertain: List[str] = field(default_factory=list)
+    locked_by: Dict[str, str] = field(default_factory=dict)  # stack_id -> lockedBy from the API
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+class LockLedger:
+    """Local record of locks taken by our tooling, with timestamps"""
+
+    def __init__(self, path: str = DEFAULT_LEDGER):
+        self.path = path
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, entries: Dict[str, Dict]):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def entries(self) -> Dict[str, Dict]:
+        return self._load()
+
+    def get(self, stack_id: str) -> Optional[Dict]:
+        return self._load().get(stack_id)
+
+    def record(self, stacks: Iterable[Stack], note: str, locked_by: Optional[Dict[str, str]] = None):
+        now = datetime.now(timezone.utc).isoformat()
+        locked_by = locked_by or {}
+        with FileLock(f"{self.path}.lock"):
+            entries = self._load()
+            for stack in stacks:
+                entries[stack.id] = {
+                    "name": stack.name,
+                    "note": note,
+                    "locked_at": now,
+                    "locked_by": locked_by.get(stack.id)
+                }
+            self._save(entries)
+
+    def release(self, stack_ids: Iterable[str]):
+        with FileLock(f"{self.path}.lock"):
+            entries = self._load()
+            for stack_id in stack_ids:
+                entries.pop(stack_id, None)
+            self._save(entries)
+
+    def reconcile(self, stacks: Iterable[Dict]) -> Dict[str, Dict]:
+        """
+        Drop entries for stacks (raw API dicts) that are unlocked now or locked
+        by someone else, e.g. unlocked in the UI and re-locked later; returns
+        the entries that still describe the current lock
+        """
+        live = {s['id']: s.get('lockedBy') for s in stacks}
+        with FileLock(f"{self.path}.lock"):
+            entries = self._load()
+            stale = [
+                stack_id for stack_id, entry in entries.items()
+                if stack_id in live and (not live[stack_id] or live[stack_id] != entry.get('locked_by'))
+            ]
+            for stack_id in stale:
+                del entries[stack_id]
+            if stale:
+                self._save(entries)
+        return entries
+
+    def locked_at(self, stack_id: str) -> Optional[datetime]:
+        entry = self.get(stack_id)
+        return datetime.fromisoformat(entry['locked_at']) if entry else None
+
+
+class BulkLockManager:
+    def __init__(self, client, ledger: Optional[LockLedger] = None,
+                 batch_size: int = 50, max_workers: int = 4):
+        self.client = client
+        self.ledger = ledger or LockLedger()
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+
+    # ===== SELECTION =====
+
+    def stacks_by_label(self, label: str) -> List[Stack]:
+        return [s for s in self.client.list_stack_models() if label in s.labels]
+
+    def stacks_by_space(self, space: str) -> List[Stack]:
+        """Stacks whose space id or name matches `space`"""
+        return [
+            s for s in self.client.list_stack_models()
+            if s.space and space in (s.space.id, s.space.name)
+        ]
+
+    # ===== BATCHED MUTATIONS =====
+
+    def _mutate(self, mutation: str, stacks: List[Stack], note: Optional[str]) -> BulkLockResult:
+        """Run one aliased mutation per stack, batched and concurrent"""
+        batches = [stacks[i:i + self.batch_size] for i in range(0, len(stacks), self.batch_size)]
+        result = BulkLockResult()
+
+        def run_batch(batch: List[Stack]):
+            params = ["$note: String"] if note is not None else []
+            fields = []
+            variables = {"note": note} if note is not None else {}
+            for i, stack in enumerate(batch):
+                params.append(f"$id{i}: ID!")
+                args = f"id: $id{i}, note: $note" if note is not None else f"id: $id{i}"
+                fields.append(f"s{i}: {mutation}({args}) {{ id lockedBy }}")
+                variables[f"id{i}"] = stack.id
+
+            query = f"mutation Bulk({', '.join(params)}) {{ {' '.join(fields)} }}"
+            try:
+                data, errors = self.client.execute_partial(query, variables)
+            except Exception as e:
+                return {stack.id: str(e) for stack in batch}, [], [s.id for s in batch], {}
+
+            failed = {}
+            for error in errors:
+                alias = (error.get('path') or [None])[0]
+                if alias and alias.startswith('s') and alias[1:].isdigit():
+                    failed[batch[int(alias[1:])].id] = error.get('message', 'unknown error')
+            for i, stack in enumerate(batch):
+                if not data.get(f"s{i}") and stack.id not in failed:
+                    failed[stack.id] = "; ".join(e.get('message', '') for e in errors) or "no result"
+            succeeded = [s.id for s in batch if s.id not in failed]
+            locked_by = {
+                stack.id: data[f"s{i}"].get('lockedBy')
+                for i, stack in enumerate(batch) if stack.id not in failed
+            }
+            return failed, succeeded, [], locked_by
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for failed, succeeded, uncertain, locked_by in pool.map(run_batch, batches):
+                result.failed.update(failed)
+                result.succeeded.extend(succeeded)
+                result.uncertain.extend(uncertain)
+                result.locked_by.update(locked_by)
+
+        self.client.invalidate_inventory()
+        return result
+
+    # ===== PUBLIC API =====
+
+    def lock_stacks(self, stacks: List[Stack], note: str = "", rollback: bool = True) -> BulkLockResult:
+        """Lock all stacks, unlocking any partial set on failure when `rollback`"""
+        already_locked = {s.id: f"already locked by {s.locked_by}" for s in stacks if s.locked}
+        if already_locked and rollback:
+            raise BulkLockError(
+                f"{len(already_locked)} stacks are already locked",
+                BulkLockResult(failed=already_locked)
+            )
+
+        result = self._mutate('stackLock', [s for s in stacks if not s.locked], note)
+        result.failed.update(already_locked)
+        by_id = {s.id: s for s in stacks}
+        self.ledger.record([by_id[i] for i in result.succeeded], note, result.locked_by)
+
+        if result.failed and rollback:
+            # Unlocking a stack that never got locked is harmless, so include
+            # batches whose outcome is unknown
+            undo = self._mutate('stackUnlock', [by_id[i] for i in result.succeeded + result.uncertain], None)
+            self.ledger.release(undo.succeeded)
+            result.rolled_back = undo.succeeded
+            raise BulkLockError(
+                f"Failed to lock {len(result.failed)} of {len(stacks)} stacks; "
+                f"rolled back {len(undo.succeeded)}",
+                result
+            )
+        return result
+
+    def unlock_stacks(self, stacks: List[Stack], only_locked: bool = True) -> BulkLockResult:
+        """Unlock stacks (best effort, no rollback)"""
+        if only_locked:
+            stacks = [s for s in stacks if s.locked]
+        result = self._mutate('stackUnlock', stacks, None)
+        self.ledger.release(result.succeeded)
+        return result
+
+    def lock_by_label(self, label: str, note: str = "") -> BulkLockResult:
+        return self.lock_stacks(self.stacks_by_label(label), note)
+
+    def unlock_by_label(self, label: str) -> BulkLockResult:
+        return self.unlock_stacks(self.stacks_by_label(label))
+
+    def lock_by_space(self, space: str, note: str = "") -> BulkLockResult:
+        return self.lock_stacks(self.stacks_by_space(space), note)
+
+    def unlock_by_space(self, space: str) -> BulkLockResult:
+        return self.unlock_stacks(self.stacks_by_space(space))
+
+    @contextmanager
+    def maintenance_window(self, stacks: List[Stack], note: str = "Maintenance window"):
+        """Lock `stacks` for the duration of the block, always unlocking afterwards"""
+        result = self.lock_stacks(stacks, note)
+        try:
+            yield result
+        finally:
+            # `stacks` predate the lock, so their locked_by is stale
+            succeeded = set(result.succeeded)
+            self.unlock_stacks([s for s in stacks if s.id in succeeded], only_locked=False)
@@ -0,0 +1,175 @@
+# api-integration/client_daemon.py
+"""
+Long-lived Spacelift client daemon plus a thin CLI that talks to it.
+
+The daemon keeps one authenticated SpaceLiftClient (token manager, keep-alive
+connection pool, warm inventory cache) and serves CLI commands over a Unix
+socket, so scripted sequences of commands skip the import/auth/inventory
+cost on every invocation:
+
+    python client_daemon.py serve &          # start once per CI job
+    python client_daemon.py list-stacks      # milliseconds per call
+    python client_daemon.py stop
+
+The thin CLI only imports the standard library. When no daemon is listening
+it falls back to running the command in-process; once a command has been
+sent it is never rerun locally, since the daemon may already have run it.
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from typing import List, Optional
+
+DEFAULT_SOCKET = os.environ.get(
+    'SPACELIFT_DAEMON_SOCKET',
+    os.path.join(os.environ.get('XDG_RUNTIME_DIR', '/tmp'), f"spacelift-client-{os.getuid()}.sock")
+)
+INVENTORY_TTL = 30  # seconds; mutations through the daemon invalidate it early
+
+
+def _send(sock: socket.socket, message: dict):
+    sock.sendall(json.dumps(message).encode() + b'\n')
+
+
+def _recv(sock: socket.socket) -> dict:
+    with sock.makefile('rb') as f:
+        line = f.readline()
+    if not line:
+        raise ConnectionError("Daemon closed the connection")
+    return json.loads(line)
+
+
+# ===== SERVER =====
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        from spacelift_client import run_command
+
+        for line in self.rfile:
+            request = json.loads(line)
+            argv = request.get('argv', [])
+
+            if argv == ['stop']:
+                self._reply({"code": 0, "output": "Daemon stopping\n"})
+                # shutdown() blocks until serve_forever returns, so not from this thread
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            if argv == ['ping']:
+                self._reply({"code": 0, "output": "pong\n"})
+                continue
+
+            out = io.StringIO()
+            try:
+                code = run_command(argv, client=self.server.client, out=out)
+            except Exception as e:
+                print(f"❌ {e}", file=out)
+                code = 1
+            self._reply({"code": code, "output": out.getvalue()})
+
+    def _reply(self, message: dict):
+        self.wfile.write(json.dumps(message).encode() + b'\n')
+        self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: str = DEFAULT_SOCKET):
+    """Run the daemon in the foreground until `stop` is received"""
+    from spacelift_client import SpaceLiftClient
+
+    if is_running(socket_path):
+        print(f"Daemon already running on {socket_path}")
+        return 1
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # stale socket from a crashed daemon
+
+    client = SpaceLiftClient(inventory_ttl=INVENTORY_TTL)
+    client.tokens.prefetch()
+
+    old_umask = os.umask(0o177)  # socket is usable by the owner only
+    try:
+        server = _Server(socket_path, _Handler)
+    finally:
+        os.umask(old_umask)
+    server.client = client
+
+    print(f"✅ Spacelift client daemon listening on {socket_path}")
+    try:
+        server.serve_forever(poll_interval=0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        client.tokens.stop()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+    return 0
+
+
+# ===== THIN CLIENT =====
+
+def is_running(socket_path: str = DEFAULT_SOCKET) -> bool:
+    try:
+        return call(['ping'], socket_path)[0] == 0
+    except (OSError, ValueError):
+        return False
+
+
+def _connect(socket_path: str = DEFAULT_SOCKET) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _request(sock: socket.socket, argv: List[str]):
+    with sock:
+        _send(sock, {"argv": argv})
+        reply = _recv(sock)
+    return reply['code'], reply['output']
+
+
+def call(argv: List[str], socket_path: str = DEFAULT_SOCKET):
+    """Send one command to the daemon and return (exit_code, output)"""
+    return _request(_connect(socket_path), argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Console entry point: `spacelift-daemon = client_daemon:main`"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['serve']:
+        return serve()
+
+    try:
+        sock = _connect(DEFAULT_SOCKET)
+    except (FileNotFoundError, ConnectionRefusedError):
+        if argv[:1] == ['stop']:
+            print("Daemon is not running")
+            return 0
+        # No daemon: behave exactly like spacelift_client.py
+        from spacelift_client import run_command
+        return run_command(argv)
+
+    try:
+        code, output = _request(sock, argv)
+    except (OSError, ValueError) as e:
+        # The daemon may have run the command before failing: don't run it twice
+        print(f"❌ Lost connection to the Spacelift client daemon: {e}", file=sys.stderr)
+        return 1
+
+    sys.stdout.write(output)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
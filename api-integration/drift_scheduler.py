@@ -0,0 +1,225 @@
+# api-integration/drift_scheduler.py
+"""
+Fleet drift-detection scheduler.
+
+Spreads plan-only (PROPOSED) runs for every stack with a label across a
+time window, stalest stacks first, without exceeding a per-space budget of
+concurrently active runs. Progress is persisted after every change, so an
+interrupted schedule resumes where it stopped, and the compliance scanner
+reads exact last-checked times from the same state file.
+
+    python drift_scheduler.py --window 3600 --per-space 2
+    python drift_scheduler.py --dry-run
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from models import TERMINAL_STATES, Stack
+from token_manager import FileLock
+
+DEFAULT_STATE = os.environ.get(
+    'SPACELIFT_DRIFT_STATE',
+    os.path.expanduser('~/.cache/spacelift/drift-schedule.json')
+)
+DRIFT_RUN_TYPE = 'PROPOSED'
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class DriftScheduleState:
+    """
+    Persistent schedule state:
+
+        {"stacks": {stack_id: {"name", "space", "last_checked", "last_run_id", "last_state"}},
+         "active": {run_id: {"stack_id", "space", "started_at"}},
+         "queue":  [{"stack_id", "due_at"}]}
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE):
+        self.path = path
+        self.data = self._load()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data.setdefault('stacks', {})
+        data.setdefault('active', {})
+        data.setdefault('queue', [])
+        return data
+
+    def reload(self):
+        self.data = self._load()
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with FileLock(f"{self.path}.lock"):
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def last_checked(self, stack_id: str) -> Optional[datetime]:
+        entry = self.data['stacks'].get(stack_id)
+        if not entry or not entry.get('last_checked'):
+            return None
+        return datetime.fromisoformat(entry['last_checked'].replace('Z', '+00:00'))
+
+
+class DriftScheduler:
+    def __init__(
+        self,
+        client,
+        state: Optional[DriftScheduleState] = None,
+        label: str = 'production',
+        window: int = 3600,
+        per_space: int = 2,
+        poll_interval: int = 10
+    ):
+        self.client = client
+        self.state = state or DriftScheduleState()
+        self.label = label
+        self.window = window
+        self.per_space = per_space
+        self.poll_interval = poll_interval
+
+    def _staleness_key(self, stack: Stack):
+        # Never-checked stacks first, then oldest check first
+        checked = self.state.data['stacks'].get(stack.id, {}).get('last_checked')
+        return (checked is not None, checked or '', stack.name)
+
+    def plan(self, save: bool = True) -> List[Dict]:
+        """Build a fresh queue: stalest first, evenly spaced across the window"""
+        stacks = [s for s in self.client.list_stack_models() if self.label in s.labels]
+        stacks.sort(key=self._staleness_key)
+
+        start = time.time()
+        spacing = self.window / len(stacks) if stacks else 0
+        queue = []
+        for i, stack in enumerate(stacks):
+            entry = self.state.data['stacks'].setdefault(stack.id, {})
+            entry.update(name=stack.name, space=stack.space.id if stack.space else 'root')
+            queue.append({"stack_id": stack.id, "due_at": start + i * spacing})
+
+        if save:
+            self.state.data['queue'] = queue
+            self.state.save()
+        return queue
+
+    def _active_per_space(self) -> Counter:
+        return Counter(run['space'] for run in self.state.data['active'].values())
+
+    def _dispatch_due(self):
+        """Trigger due stacks whose space has budget; others wait for the next tick"""
+        now = time.time()
+        busy = self._active_per_space()
+        remaining = []
+
+        for item in self.state.data['queue']:
+            stack = self.state.data['stacks'][item['stack_id']]
+            space = stack['space']
+            if item['due_at'] > now or busy[space] >= self.per_space:
+                remaining.append(item)
+                continue
+
+            try:
+                run = self.client.trigger_run(item['stack_id'], run_type=DRIFT_RUN_TYPE)
+            except Exception as e:
+                print(f"❌ Failed to trigger drift check for {stack['name']}: {e}")
+                stack['last_state'] = 'TRIGGER_FAILED'
+                continue
+
+            print(f"✅ Drift check for {stack['name']}: {run['id']}")
+            self.state.data['active'][run['id']] = {
+                "stack_id": item['stack_id'],
+                "space": space,
+                "started_at": _now_iso()
+            }
+            busy[space] += 1
+
+        self.state.data['queue'] = remaining
+
+    def _poll_active(self):
+        """Record finished drift runs; their space budget frees up immediately"""
+        for run_id, active in list(self.state.data['active'].items()):
+            try:
+                run = self.client.get_run(run_id)
+            except Exception as e:
+                print(f"⚠️  Could not poll run {run_id}: {e}")
+                continue
+
+            if run is None:
+                # Run was deleted; drop it so the space budget (and --resume) isn't stuck on it
+                print(f"⚠️  Run {run_id} no longer exists, dropping it from the schedule")
+                del self.state.data['active'][run_id]
+                continue
+
+            if run['state'] in TERMINAL_STATES or run['state'] == 'UNCONFIRMED':
+                stack = self.state.data['stacks'][active['stack_id']]
+                stack.update(last_run_id=run_id, last_state=run['state'])
+                # Only a completed plan counts as drift coverage; failed or
+                # canceled checks must still be flagged by the compliance scan
+                if run['state'] == 'FINISHED':
+                    stack['last_checked'] = run.get('finishedAt') or _now_iso()
+                del self.state.data['active'][run_id]
+
+    def run(self, resume: bool = False):
+        """Execute the schedule until every queued stack has been checked"""
+        if not (resume and (self.state.data['queue'] or self.state.data['active'])):
+            self.plan()
+
+        while self.state.data['queue'] or self.state.data['active']:
+            self._poll_active()
+            self._dispatch_due()
+            self.state.save()
+
+            if self.state.data['queue'] or self.state.data['active']:
+                time.sleep(self.poll_interval)
+
+        print(f"✅ Drift schedule complete ({len(self.state.data['stacks'])} stacks tracked)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Schedule drift-detection runs across a fleet")
+    parser.add_argument('--label', default='production')
+    parser.add_argument('--window', type=int, default=3600, help="seconds to spread runs over")
+    parser.add_argument('--per-space', type=int, default=2, help="max concurrent runs per space")
+    parser.add_argument('--poll-interval', type=int, default=10)
+    parser.add_argument('--resume', action='store_true', help="continue a persisted schedule")
+    parser.add_argument('--dry-run', action='store_true', help="print the schedule only")
+    args = parser.parse_args(argv)
+
+    from spacelift_client import get_client
+    scheduler = DriftScheduler(
+        get_client(),
+        label=args.label,
+        window=args.window,
+        per_space=args.per_space,
+        poll_interval=args.poll_interval
+    )
+
+    if args.dry_run:
+        start = time.time()
+        for item in scheduler.plan(save=False):
+            stack = scheduler.state.data['stacks'][item['stack_id']]
+            print(f"+{item['due_at'] - start:>6.0f}s  {stack['name']} "
+                  f"(space: {stack['space']}, last checked: {stack.get('last_checked') or 'never'})")
+        return 0
+
+    scheduler.run(resume=args.resume)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+# api-integration/models.py
+"""
+Compact, immutable models for Spacelift API objects.
+
+Models are decoded directly from GraphQL response dicts. Every model uses
+__slots__ (no per-instance __dict__), state strings are interned, and
+identical label sets are shared between stacks, so large inventories cost a
+fraction of the raw nested dicts. `to_dict()` rebuilds the API shape for
+JSON responses.
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+# Known run/stack states; anything else the API returns is still interned
+STATES = frozenset({
+    'NONE', 'QUEUED', 'READY', 'PREPARING', 'PREPARING_APPLY', 'PREPARING_REPLAN',
+    'INITIALIZING', 'PLANNING', 'UNCONFIRMED', 'CONFIRMED', 'APPLYING',
+    'DESTROYING', 'PERFORMING', 'REPLAN_REQUESTED', 'STOPPED', 'RUNNING',
+    'FINISHED', 'FAILED', 'CANCELED', 'DISCARDED',
+})
+TERMINAL_STATES = frozenset({'FINISHED', 'FAILED', 'CANCELED', 'DISCARDED'})
+ACTIVE_STATES = frozenset({'QUEUED', 'PREPARING', 'RUNNING'})
+
+_label_sets: Dict[Tuple[str, ...], FrozenSet[str]] = {}
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def _labels(values) -> FrozenSet[str]:
+    """Shared frozenset per distinct label list (stacks reuse a few combinations)"""
+    key = tuple(values or ())
+    labels = _label_sets.get(key)
+    if labels is None:
+        labels = _label_sets.setdefault(key, frozenset(sys.intern(l) for l in key))
+    return labels
+
+
+@dataclass(frozen=True)
+class Space:
+    __slots__ = ('id', 'name')
+    id: str
+    name: str
+
+    @classmethod
+    def from_api(cls, data: Optional[Dict]) -> Optional['Space']:
+        if not data:
+            return None
+        return cls(id=data['id'], name=_intern(data.get('name')))
+
+    def to_dict(self) -> Dict:
+        return {"id": self.id, "name": self.name}
+
+
+@dataclass(frozen=True)
+class Delta:
+    __slots__ = ('add', 'change', 'delete')
+    add: int
+    change: int
+    delete: int
+
+    @classmethod
+    def from_api(cls, data: Optional[Dict]) -> Optional['Delta']:
+        if not data:
+            return None
+        return cls(
+            add=data.get('addCount', 0),
+            change=data.get('changeCount', 0),
+            delete=data.get('deleteCount', 0)
+        )
+
+    def to_dict(self) -> Dict:
+        return {"addCount": self.add, "changeCount": self.change, "deleteCount": self.delete}
+
+
+@dataclass(frozen=True)
+class PolicyReceipt:
+    __slots__ = ('policy_name', 'policy_type', 'outcome', 'denies', 'warnings')
+    policy_name: str
+    policy_type: str
+    outcome: str
+    denies: Tuple[str, ...]
+    warnings: Tuple[str, ...]
+
+    @classmethod
+    def from_api(cls, data: Dict) -> 'PolicyReceipt':
+        policy = data.get('policy') or {}
+        return cls(
+            policy_name=_intern(policy.get('name')),
+            policy_type=_intern(policy.get('type')),
+            outcome=_intern(data.get('outcome')),
+            denies=tuple(data.get('denies') or ()),
+            warnings=tuple(data.get('warnings') or ())
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "policy": {"name": self.policy_name, "type": self.policy_type},
+            "outcome": self.outcome,
+            "denies": list(self.denies),
+            "warnings": list(self.warnings)
+        }
+
+
+@dataclass(frozen=True)
+class Run:
+    __slots__ = ('id', 'state', 'type', 'created_at', 'finished_at',
+                 'triggered_by', 'delta', 'policy_receipts')
+    id: str
+    state: str
+    type: Optional[str]
+    created_at: Optional[str]
+    finished_at: Optional[str]
+    triggered_by: Optional[str]
+    delta: Optional[Delta]
+    policy_receipts: Tuple[PolicyReceipt, ...]
+
+    @classmethod
+    def from_api(cls, data: Dict) -> 'Run':
+        return cls(
+            id=data['id'],
+            state=_intern(data['state']),
+            type=_intern(data.get('type')),
+            created_at=data.get('createdAt'),
+            finished_at=data.get('finishedAt'),
+            triggered_by=_intern(data.get('triggeredBy')),
+            delta=Delta.from_api(data.get('delta')),
+            policy_receipts=tuple(PolicyReceipt.from_api(r) for r in data.get('policyReceipts') or ())
+        )
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    def to_dict(self) -> Dict:
+        data = {
+            "id": self.id,
+            "state": self.state,
+            "type": self.type,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+            "triggeredBy": self.triggered_by,
+            "delta": self.delta.to_dict() if self.delta else None
+        }
+        if self.policy_receipts:
+            data["policyReceipts"] = [r.to_dict() for r in self.policy_receipts]
+        return data
+
+
+@dataclass(frozen=True)
+class Stack:
+    __slots__ = ('id', 'name', 'description', 'state', 'labels', 'locked_by', 'space', 'runs')
+    id: str
+    name: str
+    description: Optional[str]
+    state: str
+    labels: FrozenSet[str]
+    locked_by: Optional[str]
+    space: Optional[Space]
+    runs: Tuple[Run, ...]
+
+    @classmethod
+    def from_api(cls, data: Dict) -> 'Stack':
+        return cls(
+            id=data['id'],
+            name=data['name'],
+            description=data.get('description'),
+            state=_intern(data['state']),
+            labels=_labels(data.get('labels')),
+            locked_by=data.get('lockedBy'),
+            space=Space.from_api(data.get('space')),
+            runs=tuple(Run.from_api(r) for r in data.get('runs') or ())
+        )
+
+    @property
+    def locked(self) -> bool:
+        return bool(self.locked_by)
+
+    @property
+    def space_name(self) -> str:
+        return self.space.name if self.space else 'root'
+
+    def to_dict(self) -> Dict:
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "state": self.state,
+            "labels": sorted(self.labels),
+            "lockedBy": self.locked_by,
+            "space": self.space.to_dict() if self.space else None
+        }
+        if self.runs:
+            data["runs"] = [r.to_dict() for r in self.runs]
+        return data
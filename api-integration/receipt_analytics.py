@@ -0,0 +1,262 @@
+# api-integration/receipt_analytics.py
+"""
+Policy-receipt aggregation and denial hot-spot analysis.
+
+Receipts from get_run() are collected concurrently for recent runs and
+reduced to counters: each deny/warning message is normalised to a template
+(quoted values, resource addresses, IPs/CIDRs, ids and numbers replaced by
+placeholders), and counts are
+kept per (template, stack, day). Each run is counted once, so collection is
+incremental and storage grows with distinct templates x stacks x days, not
+with the number of receipts. Counters live next to the run history in the
+same SQLite file.
+
+    python receipt_analytics.py collect
+    python receipt_analytics.py top [--days 30] [--limit 20]
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import TERMINAL_STATES, PolicyReceipt
+from run_history import DAY, DEFAULT_PATH, to_epoch
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipt_templates (
+    template_id  INTEGER PRIMARY KEY,
+    policy_name  TEXT NOT NULL,
+    policy_type  TEXT,
+    kind         TEXT NOT NULL,  -- 'deny' or 'warning'
+    template     TEXT NOT NULL,
+    example      TEXT,
+    UNIQUE (policy_name, kind, template)
+);
+CREATE TABLE IF NOT EXISTS receipt_counts (
+    template_id  INTEGER NOT NULL,
+    stack_id     TEXT NOT NULL,
+    bucket       TEXT NOT NULL,  -- YYYY-MM-DD
+    count        INTEGER NOT NULL,
+    PRIMARY KEY (template_id, stack_id, bucket)
+);
+CREATE INDEX IF NOT EXISTS receipt_counts_bucket ON receipt_counts (bucket);
+CREATE TABLE IF NOT EXISTS receipt_runs (
+    run_id       TEXT PRIMARY KEY
+);
+"""
+
+INGEST_BATCH = 500
+UNKNOWN_POLICY = '<unknown>'  # receipts whose policy was deleted or not returned
+
+_QUOTED = re.compile(r'"[^"]*"|\'[^\']*\'|`[^`]*`')
+_CIDR = re.compile(r'\b\d{1,3}(\.\d{1,3}){3}(/\d{1,2})?\b')
+# Resource types always contain an underscore (provider_type), which keeps
+# version numbers and ordinary dotted words out
+_ADDRESS = re.compile(r'\b(module\.[\w-]+\.)*[a-z][a-z0-9]*_\w+\.[\w-]+(\[[^\]]+\])?')
+_ID = re.compile(r'\b[0-9A-Z]{26}\b|\b[0-9a-f]{7,40}\b')
+_NUMBER = re.compile(r'\b\d+(\.\d+)?\b')
+
+
+def message_template(message: str) -> str:
+    """Collapse the variable parts of a policy message so similar denies group together"""
+    template = _QUOTED.sub('<value>', message)
+    template = _CIDR.sub('<cidr>', template)
+    template = _ADDRESS.sub('<address>', template)
+    template = _ID.sub('<id>', template)
+    return _NUMBER.sub('<n>', template).strip()
+
+
+class ReceiptAggregator:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._template_ids: Dict[Tuple[str, str, str], int] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ===== INGEST =====
+
+    def _template_id(self, conn, receipt: PolicyReceipt, kind: str, message: str) -> int:
+        template = message_template(message)
+        # policy_name is NOT NULL: a null would make INSERT OR IGNORE skip the row
+        key = (receipt.policy_name or UNKNOWN_POLICY, kind, template)
+        template_id = self._template_ids.get(key)
+        if template_id is None:
+            conn.execute(
+                "INSERT OR IGNORE INTO receipt_templates "
+                "(policy_name, policy_type, kind, template, example) VALUES (?, ?, ?, ?, ?)",
+                (key[0], receipt.policy_type, kind, template, message)
+            )
+            template_id = conn.execute(
+                "SELECT template_id FROM receipt_templates WHERE policy_name = ? AND kind = ? AND template = ?",
+                key
+            ).fetchone()[0]
+            self._template_ids[key] = template_id
+        return template_id
+
+    def ingest(self, runs: Iterable[Tuple[str, Dict]]) -> int:
+        """Count receipts of (stack_id, raw run dict) pairs; runs already counted are skipped"""
+        ingested = 0
+        with self._connect() as conn:
+            for stack_id, run in runs:
+                if conn.execute("INSERT OR IGNORE INTO receipt_runs VALUES (?)", (run['id'],)).rowcount == 0:
+                    continue
+                ingested += 1
+
+                created = to_epoch(run.get('createdAt')) or time.time()
+                bucket = datetime.fromtimestamp(created, timezone.utc).strftime('%Y-%m-%d')
+                counts: Dict[int, int] = {}
+                for raw in run.get('policyReceipts') or ():
+                    receipt = PolicyReceipt.from_api(raw)
+                    for kind, messages in (('deny', receipt.denies), ('warning', receipt.warnings)):
+                        for message in messages:
+                            template_id = self._template_id(conn, receipt, kind, message)
+                            counts[template_id] = counts.get(template_id, 0) + 1
+
+                conn.executemany("""
+                    INSERT INTO receipt_counts VALUES (?, ?, ?, ?)
+                    ON CONFLICT(template_id, stack_id, bucket) DO UPDATE SET count = count + excluded.count
+                """, [(t, stack_id, bucket, n) for t, n in counts.items()])
+        return ingested
+
+    def collect(self, client, max_workers: int = 16) -> int:
+        """Fetch receipts for every stack's recent terminal runs not yet counted"""
+        stacks = client.list_stacks()
+
+        def stack_runs(stack):
+            try:
+                return client.get_stack(stack['id'])
+            except Exception as e:
+                print(f"⚠️  Could not fetch runs for stack {stack['id']}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            details = list(pool.map(stack_runs, stacks))
+
+            candidates = [
+                (stack['id'], run['id'])
+                for stack, detail in zip(stacks, details) if detail
+                for run in detail.get('runs') or ()
+                if run['state'] in TERMINAL_STATES
+            ]
+            with self._connect() as conn:
+                seen = {r[0] for r in conn.execute("SELECT run_id FROM receipt_runs")}
+            pending = [(stack_id, run_id) for stack_id, run_id in candidates if run_id not in seen]
+
+            def fetch(candidate):
+                stack_id, run_id = candidate
+                try:
+                    return stack_id, client.get_run(run_id)
+                except Exception as e:
+                    print(f"⚠️  Could not fetch receipts for run {run_id}: {e}")
+                    return None
+
+            # Ingest in batches so the SQLite write lock isn't held across network waits
+            results = (r for r in pool.map(fetch, pending) if r is not None)
+            ingested = 0
+            while True:
+                batch = list(islice(results, INGEST_BATCH))
+                if not batch:
+                    return ingested
+                ingested += self.ingest(batch)
+
+    # ===== QUERIES =====
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict]:
+        with self._connect() as conn:
+            return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _since(days: int) -> str:
+        return datetime.fromtimestamp(time.time() - days * DAY, timezone.utc).strftime('%Y-%m-%d')
+
+    def hot_spots(self, days: int = 30, kind: str = 'deny', limit: int = 20) -> List[Dict]:
+        """Most frequent messages (by template) with how many stacks they hit"""
+        return self._query("""
+            SELECT t.policy_name, t.policy_type, t.template, t.example,
+                   sum(c.count) AS count,
+                   count(DISTINCT c.stack_id) AS stacks,
+                   max(c.bucket) AS last_seen
+            FROM receipt_counts c JOIN receipt_templates t USING (template_id)
+            WHERE t.kind = ? AND c.bucket >= ?
+            GROUP BY t.template_id ORDER BY count DESC LIMIT ?
+        """, (kind, self._since(days), limit))
+
+    def by_policy(self, days: int = 30) -> List[Dict]:
+        return self._query("""
+            SELECT t.policy_name,
+                   sum(CASE WHEN t.kind = 'deny' THEN c.count ELSE 0 END) AS denies,
+                   sum(CASE WHEN t.kind = 'warning' THEN c.count ELSE 0 END) AS warnings,
+                   count(DISTINCT c.stack_id) AS stacks
+            FROM receipt_counts c JOIN receipt_templates t USING (template_id)
+            WHERE c.bucket >= ?
+            GROUP BY t.policy_name ORDER BY denies DESC, warnings DESC
+        """, (self._since(days),))
+
+    def by_stack(self, days: int = 30, policy_name: Optional[str] = None) -> List[Dict]:
+        return self._query("""
+            SELECT c.stack_id, sum(c.count) AS denies
+            FROM receipt_counts c JOIN receipt_templates t USING (template_id)
+            WHERE t.kind = 'deny' AND c.bucket >= ? AND (? IS NULL OR t.policy_name = ?)
+            GROUP BY c.stack_id ORDER BY denies DESC
+        """, (self._since(days), policy_name, policy_name))
+
+    def daily(self, days: int = 30, policy_name: Optional[str] = None) -> List[Dict]:
+        return self._query("""
+            SELECT c.bucket AS day, sum(c.count) AS denies
+            FROM receipt_counts c JOIN receipt_templates t USING (template_id)
+            WHERE t.kind = 'deny' AND c.bucket >= ? AND (? IS NULL OR t.policy_name = ?)
+            GROUP BY c.bucket ORDER BY c.bucket
+        """, (self._since(days), policy_name, policy_name))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ('collect', 'top'):
+        print("Usage: python receipt_analytics.py collect | top [--days N] [--limit N] [--warnings]")
+        return 1
+
+    aggregator = ReceiptAggregator()
+    if argv[0] == 'collect':
+        from spacelift_client import get_client
+        count = aggregator.collect(get_client())
+        print(f"✅ Aggregated policy receipts from {count} new runs")
+        return 0
+
+    days = int(argv[argv.index('--days') + 1]) if '--days' in argv else 30
+    limit = int(argv[argv.index('--limit') + 1]) if '--limit' in argv else 20
+    kind = 'warning' if '--warnings' in argv else 'deny'
+
+    print(f"Policies ({days} days)")
+    print("-" * 60)
+    for row in aggregator.by_policy(days):
+        print(f"  {row['policy_name']:<36} {row['denies']:>6} denies {row['warnings']:>6} warnings")
+
+    print(f"\nTop {kind} messages")
+    print("-" * 60)
+    for row in aggregator.hot_spots(days, kind=kind, limit=limit):
+        print(f"  {row['count']:>6}x  [{row['policy_name']}] {row['template']}")
+        print(f"          {row['stacks']} stacks, last seen {row['last_seen']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+# api-integration/run_history.py
+"""
+Local run-history store for trend analytics.
+
+Runs seen through get_stack()/get_run() are appended to a SQLite database,
+indexed by stack, time and state, so deployment frequency, failure rates
+and MTTR come from local queries instead of fanning out to the API. A run
+row is written once and only updated while it is still in progress; once
+it reaches a terminal state it is immutable.
+
+    python run_history.py sync [--receipts]
+    python run_history.py stats [--days 30]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from models import TERMINAL_STATES
+
+DEFAULT_PATH = os.environ.get(
+    'SPACELIFT_RUN_HISTORY',
+    os.path.expanduser('~/.cache/spacelift/run-history.sqlite3')
+)
+DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id        TEXT PRIMARY KEY,
+    stack_id      TEXT NOT NULL,
+    stack_name    TEXT,
+    state         TEXT NOT NULL,
+    type          TEXT,
+    created_at    REAL,
+    finished_at   REAL,
+    triggered_by  TEXT,
+    add_count     INTEGER,
+    change_count  INTEGER,
+    delete_count  INTEGER,
+    recorded_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_stack_time ON runs (stack_id, created_at);
+CREATE INDEX IF NOT EXISTS runs_time ON runs (created_at);
+CREATE INDEX IF NOT EXISTS runs_state_time ON runs (state, created_at);
+
+CREATE TABLE IF NOT EXISTS policy_receipts (
+    run_id       TEXT NOT NULL,
+    policy_name  TEXT,
+    policy_type  TEXT,
+    outcome      TEXT,
+    denies       TEXT,
+    warnings     TEXT,
+    PRIMARY KEY (run_id, policy_name)
+);
+"""
+
+
+def to_epoch(value) -> Optional[float]:
+    """API timestamps arrive as unix seconds or ISO-8601 strings"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+class RunHistory:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # readers don't block the syncer
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation: safe across Flask threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ===== INGEST =====
+
+    def record_runs(self, stack_id: str, stack_name: str, runs: Iterable[Dict]) -> int:
+        """Append one stack's runs (raw API dicts); in-progress rows are updated until terminal"""
+        return self.record_stacks([{"id": stack_id, "name": stack_name, "runs": runs}])
+
+    def record_stacks(self, stacks: Iterable[Dict]) -> int:
+        """Record the `runs` of many raw API stack dicts in a single transaction"""
+        now = time.time()
+        rows = []
+        receipts = []
+        for stack in stacks:
+            for run in stack.get('runs') or ():
+                delta = run.get('delta') or {}
+                rows.append((
+                    run['id'], stack['id'], stack['name'], run['state'], run.get('type'),
+                    to_epoch(run.get('createdAt')), to_epoch(run.get('finishedAt')),
+                    run.get('triggeredBy'), delta.get('addCount'), delta.get('changeCount'),
+                    delta.get('deleteCount'), now
+                ))
+                for receipt in run.get('policyReceipts') or ():
+                    policy = receipt.get('policy') or {}
+                    receipts.append((
+                        run['id'], policy.get('name'), policy.get('type'), receipt.get('outcome'),
+                        json.dumps(receipt.get('denies') or []), json.dumps(receipt.get('warnings') or [])
+                    ))
+
+        terminal = ", ".join(f"'{s}'" for s in sorted(TERMINAL_STATES))
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(f"""
+                INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(run_id) DO UPDATE SET
+                    state = excluded.state,
+                    finished_at = excluded.finished_at,
+                    add_count = coalesce(excluded.add_count, add_count),
+                    change_count = coalesce(excluded.change_count, change_count),
+                    delete_count = coalesce(excluded.delete_count, delete_count),
+                    recorded_at = excluded.recorded_at
+                WHERE runs.state NOT IN ({terminal})
+            """, rows)
+            conn.executemany(
+                "INSERT OR IGNORE INTO policy_receipts VALUES (?, ?, ?, ?, ?, ?)", receipts
+            )
+            return conn.total_changes - before
+
+    def known_terminal_runs(self, run_ids: Iterable[str]) -> set:
+        run_ids = list(run_ids)
+        if not run_ids:
+            return set()
+        placeholders = ", ".join("?" * len(run_ids))
+        terminal = ", ".join(f"'{s}'" for s in sorted(TERMINAL_STATES))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT run_id FROM runs WHERE run_id IN ({placeholders}) AND state IN ({terminal})",
+                run_ids
+            ).fetchall()
+        return {r['run_id'] for r in rows}
+
+    def sync(self, client, include_receipts: bool = False, max_workers: int = 8) -> int:
+        """Pull recent runs for every stack; only new runs cost a get_run call"""
+        stacks = client.list_stacks()
+
+        def sync_stack(stack: Dict) -> int:
+            detail = client.get_stack(stack['id'])
+            runs = detail.get('runs') or []
+            if include_receipts:
+                done = self.known_terminal_runs(r['id'] for r in runs)
+                runs = [client.get_run(r['id']) if r['id'] not in done else r for r in runs]
+            return self.record_runs(stack['id'], stack['name'], runs)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return sum(pool.map(sync_stack, stacks))
+
+    # ===== AGGREGATES =====
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict]:
+        with self._connect() as conn:
+            return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+    def deployment_frequency(self, days: int = 30, stack_id: Optional[str] = None) -> List[Dict]:
+        """Successful TRACKED runs per day"""
+        since = time.time() - days * DAY
+        return self._query("""
+            SELECT date(created_at, 'unixepoch') AS day, count(*) AS deployments
+            FROM runs
+            WHERE state = 'FINISHED' AND type = 'TRACKED' AND created_at >= ?
+              AND (? IS NULL OR stack_id = ?)
+            GROUP BY day ORDER BY day
+        """, (since, stack_id, stack_id))
+
+    def failure_rates(self, days: int = 30) -> List[Dict]:
+        """Per-stack share of terminal runs that FAILED"""
+        since = time.time() - days * DAY
+        return self._query("""
+            SELECT stack_id, stack_name,
+                   count(*) AS runs,
+                   sum(state = 'FAILED') AS failed,
+                   round(100.0 * sum(state = 'FAILED') / count(*), 1) AS failure_rate
+            FROM runs
+            WHERE created_at >= ? AND state IN ('FINISHED', 'FAILED')
+            GROUP BY stack_id ORDER BY failure_rate DESC, runs DESC
+        """, (since,))
+
+    def mttr(self, days: int = 30) -> Dict:
+        """Mean time from a failed TRACKED run to the stack's next successful one"""
+        since = time.time() - days * DAY
+        rows = self._query("""
+            SELECT f.stack_id,
+                   (SELECT min(coalesce(ok.finished_at, ok.created_at)) FROM runs ok
+                    WHERE ok.stack_id = f.stack_id AND ok.type = 'TRACKED'
+                      AND ok.state = 'FINISHED' AND ok.created_at > f.created_at)
+                   - f.created_at AS recovery
+            FROM runs f
+            WHERE f.state = 'FAILED' AND f.type = 'TRACKED' AND f.created_at >= ?
+        """, (since,))
+        recoveries = [r['recovery'] for r in rows if r['recovery'] is not None]
+        return {
+            "incidents": len(rows),
+            "recovered": len(recoveries),
+            "mttr_seconds": round(sum(recoveries) / len(recoveries)) if recoveries else None
+        }
+
+    def summary(self, days: int = 30) -> Dict:
+        since = time.time() - days * DAY
+        totals = self._query("""
+            SELECT count(*) AS runs,
+                   sum(state = 'FINISHED') AS finished,
+                   sum(state = 'FAILED') AS failed,
+                   count(DISTINCT stack_id) AS stacks
+            FROM runs WHERE created_at >= ?
+        """, (since,))[0]
+        return dict(totals, days=days, **self.mttr(days))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ('sync', 'stats'):
+        print("Usage: python run_history.py sync [--receipts] | stats [--days N]")
+        return 1
+
+    history = RunHistory()
+    if argv[0] == 'sync':
+        from spacelift_client import get_client
+        changed = history.sync(get_client(), include_receipts='--receipts' in argv)
+        print(f"✅ Recorded {changed} new or updated runs in {history.path}")
+    else:
+        days = int(argv[argv.index('--days') + 1]) if '--days' in argv else 30
+        print(json.dumps({
+            "summary": history.summary(days),
+            "deployments_per_day": history.deployment_frequency(days),
+            "failure_rates": history.failure_rates(days)
+        }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# api-integration/scripts/bench_startup.py
+"""
+Measure cold-start time of the tooling entry points against a budget.
+
+Each target runs in a fresh interpreter without Spacelift credentials, so an
+entry point that authenticates or builds a client at import time fails here
+instead of silently slowing every CLI call. Exits non-zero if any target
+fails or exceeds its budget.
+
+    python scripts/bench_startup.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+API_DIR = os.path.join(ROOT, 'api-integration')
+
+# (name, code run with `python -c`, extra sys.path entry, budget in ms on top of bare interpreter start)
+TARGETS = [
+    ("import spacelift_client", "import spacelift_client", API_DIR, 60),
+    ("spacelift_client usage", "import sys, spacelift_client; sys.argv = ['x']; spacelift_client.main()", API_DIR, 60),
+    ("import client_daemon", "import client_daemon", API_DIR, 40),
+    ("import scanner", "import scanner", os.path.join(ROOT, 'compliance'), 80),
+    ("import dashboard app", "import app", os.path.join(ROOT, 'dashboard'), 600),
+]
+
+
+def _time_run(code: str, path: str, env: dict) -> float:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=path, env=env, capture_output=True, text=True
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    # Usage output exits 1 by design; anything else (e.g. a traceback) is a failure
+    if result.returncode not in (0, 1) or 'Traceback' in result.stderr:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "failed")
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    env = {k: v for k, v in os.environ.items() if not k.startswith('SPACELIFT_')}
+
+    baseline = statistics.median(_time_run('pass', ROOT, env) for _ in range(args.runs))
+    print(f"Interpreter baseline: {baseline:.1f} ms\n")
+    print(f"{'target':<28} {'median':>9} {'budget':>9}")
+    print("-" * 48)
+
+    failures = 0
+    for name, code, path, budget in TARGETS:
+        try:
+            _time_run(code, path, env)  # warm the bytecode cache
+            samples = [_time_run(code, path, env) - baseline for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{name:<28} ❌ {e}")
+            failures += 1
+            continue
+
+        median = statistics.median(samples)
+        status = "✅" if median <= budget else "❌"
+        failures += median > budget
+        print(f"{name:<28} {median:>7.1f}ms {budget:>7}ms {status}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,21 +10,11 @@ WAIT_FOR_COMPLETION=${2:-true}
 
 echo "=== Deploying ${ENVIRONMENT} environment ==="
 
-# Get stacks for environment
-python3 << EOF
-import json
-from spacelift_client import SpaceLiftClient
-
-client = SpaceLiftClient()
-results = client.trigger_environment_deployment("${ENVIRONMENT}")
-
-print("\n=== Deployment Results ===")
-for r in results:
-    if r['status'] == 'triggered':
-        print(f"✅ {r['stack']}: Run {r['run_id']}")
-    else:
-        print(f"❌ {r['stack']}: {r.get('error', 'Unknown error')}")
-EOF
+# Trigger runs for all stacks in the environment.
+# Uses the client daemon (client_daemon.py serve) when one is running,
+# otherwise runs the command in-process.
+CLIENT="$(dirname "$0")/../client_daemon.py"
+python3 "$CLIENT" deploy "${ENVIRONMENT}"
 
 if [ "$WAIT_FOR_COMPLETION" = "true" ]; then
     echo ""
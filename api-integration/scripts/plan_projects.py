@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# api-integration/scripts/plan_projects.py
+"""
+Parallel, cached planning of the admin stack, one target per project.
+
+Every `module` block in admin-stack/ (one stack-factory instance per
+project) becomes an independent `tofu plan -target=module.<name>`; all
+top-level resources (spaces, contexts, policies, ...) form a `_platform`
+target. Targets are planned concurrently, each in its own tofu process,
+and the `tofu show -json` output is cached under a hash of everything the
+target depends on:
+
+  - the module block and the files of its `source` directory
+  - the resources, data sources, locals and other modules it references,
+    followed transitively through their own references
+  - every variable, provider and terraform block, *.tfvars file and
+    TF_VAR_* value
+  - its slice of terraform.tfstate, the provider lock and the refresh flag
+
+A change to one project therefore replans only that project. A refreshed
+plan also reflects the live API, which no hash can cover, so it is only
+reused for --max-age seconds (default 1 hour); --no-refresh plans depend
+on the files and state alone and never expire. Results are merged into a
+single plan summary (resource changes deduplicated by address).
+
+    python scripts/plan_projects.py [--jobs 4] [--only web_app] [--no-refresh] [--max-age 3600]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ADMIN_STACK = os.path.join(ROOT, 'admin-stack')
+CACHE_DIR = os.path.join(ADMIN_STACK, '.plan-cache')
+PLATFORM = '_platform'
+
+BLOCK_RE = re.compile(
+    r'^(module|resource|data|variable|locals|provider|terraform|output)\b\s*'
+    r'(?:"([^"]+)")?(?:\s+"([^"]+)")?\s*\{', re.M
+)
+REF_RE = re.compile(r'\b((?:data\.)?[a-z]\w*\.[\w-]+)')
+LOCAL_NAME_RE = re.compile(r'^\s*(\w+)\s*=', re.M)
+SHARED_KINDS = ('variable', 'provider', 'terraform')  # hashed into every target
+DEFAULT_MAX_AGE = 3600
+SOURCE_RE = re.compile(r'^\s*source\s*=\s*"([^"]+)"', re.M)
+
+
+@dataclass
+class Target:
+    name: str
+    address: List[str]        # values for -target
+    inputs: List[str] = field(default_factory=list)
+    state_modules: List[Optional[str]] = field(default_factory=list)
+    state_resources: List[str] = field(default_factory=list)
+
+    def key(self, state: Dict, refresh: bool = True) -> str:
+        digest = hashlib.sha256(f"refresh={refresh}".encode())
+        for text in self.inputs:
+            digest.update(text.encode())
+        for resource in state.get('resources', []):
+            address = f"{resource['type']}.{resource['name']}"
+            if resource.get('module') in self.state_modules or (
+                resource.get('module') is None and address in self.state_resources
+            ):
+                digest.update(json.dumps(resource, sort_keys=True).encode())
+        for name in sorted(os.environ):
+            if name.startswith('TF_VAR_'):
+                digest.update(f"{name}={os.environ[name]}".encode())
+        return digest.hexdigest()[:16]
+
+
+def _extract_blocks(text: str) -> List[Dict]:
+    """Top-level HCL blocks with their full text (brace matching, strings skipped)"""
+    blocks = []
+    for match in BLOCK_RE.finditer(text):
+        depth, i, in_string = 0, match.end() - 1, False
+        while i < len(text):
+            ch = text[i]
+            if in_string:
+                if ch == '\\':
+                    i += 1
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            i += 1
+        kind, first, second = match.groups()
+        if kind == 'resource':
+            name = f"{first}.{second}"
+        elif kind == 'data':
+            name = f"data.{first}.{second}"
+        else:
+            name = first
+        blocks.append({"kind": kind, "name": name, "text": text[match.start():i + 1]})
+    return blocks
+
+
+def _read(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+def _reference_index(blocks: List[Dict]) -> Dict[str, str]:
+    """Map every referenceable root address (`t.n`, `data.t.n`, `module.n`, `local.n`) to its block"""
+    index = {}
+    for block in blocks:
+        if block['kind'] in ('resource', 'data'):
+            index[block['name']] = block['text']
+        elif block['kind'] == 'module':
+            index[f"module.{block['name']}"] = block['text']
+        elif block['kind'] == 'locals':
+            # Nested `key =` lines match too; extra keys for the same block are harmless
+            for name in LOCAL_NAME_RE.findall(block['text']):
+                index.setdefault(f"local.{name}", block['text'])
+    return index
+
+
+def _dependencies(text: str, index: Dict[str, str]) -> List[str]:
+    """Root addresses `text` depends on, followed transitively"""
+    referenced, pending = [], [text]
+    while pending:
+        for ref in REF_RE.findall(pending.pop()):
+            if ref in index and ref not in referenced:
+                referenced.append(ref)
+                pending.append(index[ref])
+    return referenced
+
+
+def _module_sources(module_text: str, stack_dir: str) -> List[str]:
+    """Files of a module's local `source` directory"""
+    source = SOURCE_RE.search(module_text)
+    if not (source and source.group(1).startswith('.')):
+        return []
+    source_dir = os.path.normpath(os.path.join(stack_dir, source.group(1)))
+    return [_read(os.path.join(source_dir, name)) for name in sorted(os.listdir(source_dir)) if name.endswith('.tf')]
+
+
+def discover_targets(stack_dir: str = ADMIN_STACK) -> List[Target]:
+    blocks = []
+    tfvars = []
+    for name in sorted(os.listdir(stack_dir)):
+        if name.endswith('.tf'):
+            blocks.extend(_extract_blocks(_read(os.path.join(stack_dir, name))))
+        elif name.endswith('.tfvars') or name.endswith('.tfvars.json'):
+            tfvars.append(_read(os.path.join(stack_dir, name)))
+
+    resources = sorted(b['name'] for b in blocks if b['kind'] == 'resource')
+    index = _reference_index(blocks)
+    # Variables and provider config are cheap to hash and may be read
+    # indirectly (defaults, provider arguments), so every target depends on them
+    lock_path = os.path.join(stack_dir, '.terraform.lock.hcl')
+    shared = [_read(lock_path) if os.path.exists(lock_path) else ''] + [
+        b['text'] for b in blocks if b['kind'] in SHARED_KINDS
+    ] + tfvars
+
+    def target(name: str, address: List[str], roots: List[str], own_modules: List[Optional[str]]) -> Target:
+        referenced = _dependencies("\n".join(roots), index)
+        inputs = shared + roots + [index[r] for r in referenced]
+        for module in own_modules:
+            if module:
+                inputs.extend(_module_sources(index[module], stack_dir))
+        modules = list(own_modules)
+        for ref in referenced:
+            if ref.startswith('module.'):
+                inputs.extend(_module_sources(index[ref], stack_dir))
+                modules.append(ref)
+        return Target(
+            name=name,
+            address=address,
+            inputs=inputs,
+            state_modules=modules,
+            state_resources=[r for r in referenced if r in resources]
+        )
+
+    targets = []
+    for block in (b for b in blocks if b['kind'] == 'module'):
+        address = f"module.{block['name']}"
+        targets.append(target(block['name'], [address], [block['text']], [address]))
+
+    platform = target(PLATFORM, resources, [index[r] for r in resources], [None])
+    platform.state_resources = resources
+    targets.append(platform)
+    return targets
+
+
+def plan_target(target: Target, key: str, refresh: bool = True) -> Dict:
+    """Run `tofu plan` for one target and return `tofu show -json` output"""
+    with tempfile.TemporaryDirectory() as tmp:
+        plan_file = os.path.join(tmp, 'plan.tfplan')
+        command = ['tofu', 'plan', '-input=false', '-no-color', '-lock=false', f'-out={plan_file}']
+        if not refresh:
+            command.append('-refresh=false')
+        command += [f'-target={address}' for address in target.address]
+
+        result = subprocess.run(command, cwd=ADMIN_STACK, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{target.name}: tofu plan failed\n{result.stderr.strip()}")
+
+        shown = subprocess.run(
+            ['tofu', 'show', '-json', plan_file],
+            cwd=ADMIN_STACK, capture_output=True, text=True, check=True
+        )
+    plan = json.loads(shown.stdout)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(os.path.join(CACHE_DIR, f"{target.name}-{key}.json"), 'w') as f:
+        json.dump(plan, f)
+    return plan
+
+
+def load_cached(target: Target, key: str, max_age: Optional[float] = None) -> Optional[Dict]:
+    """Cached plan for `key`, unless older than `max_age` seconds"""
+    path = os.path.join(CACHE_DIR, f"{target.name}-{key}.json")
+    try:
+        if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def merge_plans(plans: Dict[str, Dict]) -> Dict:
+    """Combine per-target plans; shared dependencies appear once"""
+    changes: Dict[str, Dict] = {}
+    summary = {}
+    for name, plan in sorted(plans.items()):
+        counts = {"create": 0, "update": 0, "delete": 0}
+        for change in plan.get('resource_changes', []):
+            actions = change['change']['actions']
+            if actions == ['no-op'] or actions == ['read']:
+                continue
+            changes.setdefault(change['address'], change)
+            for action in actions:
+                if action in counts:
+                    counts[action] += 1
+        summary[name] = counts
+
+    return {
+        "targets": summary,
+        "resource_changes": [changes[a] for a in sorted(changes)]
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Plan admin-stack projects in parallel with caching")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--only', action='append', help="plan only these targets (repeatable)")
+    parser.add_argument('--no-refresh', action='store_true', help="skip provider refresh (faster)")
+    parser.add_argument('--force', action='store_true', help="ignore the cache")
+    parser.add_argument('--max-age', type=int, default=DEFAULT_MAX_AGE,
+                        help="seconds a refreshed plan stays cached (--no-refresh plans never expire)")
+    parser.add_argument('--output', default=os.path.join(CACHE_DIR, 'merged.json'))
+    args = parser.parse_args(argv)
+
+    state_path = os.path.join(ADMIN_STACK, 'terraform.tfstate')
+    state = json.loads(_read(state_path)) if os.path.exists(state_path) else {}
+
+    targets = discover_targets()
+    if args.only:
+        targets = [t for t in targets if t.name in args.only]
+
+    plans: Dict[str, Dict] = {}
+    pending = []
+    for target in targets:
+        key = target.key(state, refresh=not args.no_refresh)
+        max_age = None if args.no_refresh else args.max_age
+        cached = None if args.force else load_cached(target, key, max_age)
+        if cached is not None:
+            print(f"⏭  {target.name}: unchanged (cache {key})")
+            plans[target.name] = cached
+        else:
+            pending.append((target, key))
+
+    failures = 0
+    # Each plan is a separate tofu process; threads only wait on them
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {
+            pool.submit(plan_target, target, key, not args.no_refresh): target
+            for target, key in pending
+        }
+        for future in as_completed(futures):
+            target = futures[future]
+            try:
+                plans[target.name] = future.result()
+                print(f"✅ {target.name}: planned")
+            except (RuntimeError, subprocess.CalledProcessError, OSError) as e:
+                print(f"❌ {e}")
+                failures += 1
+
+    merged = merge_plans(plans)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(merged, f, indent=2)
+
+    print(f"\n{'target':<24} {'create':>7} {'update':>7} {'delete':>7}")
+    print("-" * 48)
+    for name, counts in merged['targets'].items():
+        print(f"{name:<24} {counts['create']:>7} {counts['update']:>7} {counts['delete']:>7}")
+    print(f"\nMerged plan ({len(merged['resource_changes'])} changes) written to {args.output}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
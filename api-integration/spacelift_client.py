@@ -1,40 +1,59 @@
 # api-integration/spacelift_client.py
 
 import os
-import requests
-from typing import Dict, List, Optional, Any
+import sys
+import threading
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
-from datetime import datetime, timedelta
 import json
 import time
+from models import ACTIVE_STATES, Run, Stack
+from token_manager import TokenCache, TokenManager
 
 @dataclass
 class SpaceLiftConfig:
     endpoint: str
     api_key_id: str
     api_key_secret: str
+    token_cache_path: Optional[str] = None
     
     @classmethod
     def from_env(cls) -> 'SpaceLiftConfig':
         return cls(
             endpoint=os.environ['SPACELIFT_API_ENDPOINT'],
             api_key_id=os.environ['SPACELIFT_API_KEY_ID'],
-            api_key_secret=os.environ['SPACELIFT_API_KEY_SECRET']
+            api_key_secret=os.environ['SPACELIFT_API_KEY_SECRET'],
+            token_cache_path=os.environ.get('SPACELIFT_TOKEN_CACHE')
         )
 
 
 class SpaceLiftClient:
-    def __init__(self, config: Optional[SpaceLiftConfig] = None):
+    def __init__(self, config: Optional[SpaceLiftConfig] = None, inventory_ttl: float = 0):
         self.config = config or SpaceLiftConfig.from_env()
         self.graphql_url = f"{self.config.endpoint}/graphql"
-        self._token: Optional[str] = None
-        self._token_expiry: Optional[datetime] = None
+        
+        import requests  # deferred: keeps `--help`/usage paths and importers fast
+        self.session = requests.Session()  # keep-alive connection pool
+        
+        # Optional cache for list_stacks(); 0 disables it (every call hits the API)
+        self.inventory_ttl = inventory_ttl
+        self._inventory: Optional[List[Dict]] = None
+        self._inventory_at = 0.0
+        
+        cache = None
+        if self.config.token_cache_path:
+            cache = TokenCache(
+                os.path.expanduser(self.config.token_cache_path),
+                identity=f"{self.config.endpoint}|{self.config.api_key_id}"
+            )
+        self.tokens = TokenManager(self._fetch_token, cache=cache)
     
     def _get_token(self) -> str:
-        """Get or refresh JWT token"""
-        if self._token and self._token_expiry and datetime.now() < self._token_expiry:
-            return self._token
-        
+        """Get a valid JWT (refreshed in the background before expiry)"""
+        return self.tokens.get_token()
+    
+    def _fetch_token(self) -> str:
+        """Exchange the API key for a new JWT"""
         query = """
         mutation GetToken($id: ID!, $secret: String!) {
             apiKeyUser(id: $id, secret: $secret) {
@@ -43,7 +62,7 @@ class SpaceLiftClient:
         }
         """
         
-        response = requests.post(
+        response = self.session.post(
             self.graphql_url,
             json={
                 "query": query,
@@ -59,15 +78,21 @@ class SpaceLiftClient:
         if 'errors' in data:
             raise Exception(f"Authentication failed: {data['errors']}")
         
-        self._token = data['data']['apiKeyUser']['jwt']
-        self._token_expiry = datetime.now() + timedelta(minutes=50)
-        
-        return self._token
+        return data['data']['apiKeyUser']['jwt']
     
     def execute(self, query: str, variables: Optional[Dict] = None) -> Dict:
         """Execute GraphQL query/mutation"""
+        data, errors = self.execute_partial(query, variables)
+        if errors:
+            raise Exception(f"GraphQL errors: {json.dumps(errors, indent=2)}")
+        
+        return data
+    
+    def execute_partial(self, query: str, variables: Optional[Dict] = None) -> Tuple[Dict, List[Dict]]:
+        """Execute GraphQL, returning (data, errors) so batched aliases can partially succeed"""
+        token = self._get_token()
         headers = {
-            "Authorization": f"Bearer {self._get_token()}",
+            "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
         
@@ -75,19 +100,27 @@ class SpaceLiftClient:
         if variables:
             payload["variables"] = variables
         
-        response = requests.post(self.graphql_url, json=payload, headers=headers)
+        response = self.session.post(self.graphql_url, json=payload, headers=headers)
+        if response.status_code == 401:
+            # Token revoked or clock skew: drop it so the next call re-authenticates
+            self.tokens.invalidate(token)
         response.raise_for_status()
         
         result = response.json()
-        if 'errors' in result:
-            raise Exception(f"GraphQL errors: {json.dumps(result['errors'], indent=2)}")
-        
-        return result['data']
+        return result.get('data') or {}, result.get('errors') or []
     
     # ===== STACK OPERATIONS =====
     
+    def invalidate_inventory(self):
+        """Drop the cached stack list after a mutation"""
+        self._inventory = None
+    
     def list_stacks(self) -> List[Dict]:
         """List all stacks"""
+        if self.inventory_ttl and self._inventory is not None \
+                and time.time() - self._inventory_at < self.inventory_ttl:
+            return self._inventory
+        
         query = """
         query {
             stacks {
@@ -101,7 +134,10 @@ class SpaceLiftClient:
             }
         }
         """
-        return self.execute(query)['stacks']
+        stacks = self.execute(query)['stacks']
+        if self.inventory_ttl:
+            self._inventory, self._inventory_at = stacks, time.time()
+        return stacks
     
     def get_stack(self, stack_id: str) -> Dict:
         """Get detailed stack information"""
@@ -142,20 +178,45 @@ class SpaceLiftClient:
         stacks = self.list_stacks()
         return [s for s in stacks if label in s.get('labels', [])]
     
+    # ===== TYPED MODELS =====
+    
+    def list_stack_models(self) -> List[Stack]:
+        """List all stacks as compact Stack models"""
+        return [Stack.from_api(s) for s in self.list_stacks()]
+    
+    def get_stack_model(self, stack_id: str) -> Stack:
+        """Get a stack (with its recent runs) as a Stack model"""
+        return Stack.from_api(self.get_stack(stack_id))
+    
+    def get_run_model(self, run_id: str) -> Run:
+        """Get a run (with policy receipts) as a Run model"""
+        return Run.from_api(self.get_run(run_id))
+    
     # ===== RUN OPERATIONS =====
     
-    def trigger_run(self, stack_id: str, commit_sha: Optional[str] = None) -> Dict:
-        """Trigger a new run"""
+    def trigger_run(
+        self,
+        stack_id: str,
+        commit_sha: Optional[str] = None,
+        run_type: Optional[str] = None
+    ) -> Dict:
+        """Trigger a new run (TRACKED by default, PROPOSED for plan-only)"""
         query = """
-        mutation TriggerRun($stackId: ID!, $commitSha: String) {
-            runTrigger(stack: $stackId, commitSha: $commitSha) {
+        mutation TriggerRun($stackId: ID!, $commitSha: String, $runType: RunType) {
+            runTrigger(stack: $stackId, commitSha: $commitSha, runType: $runType) {
                 id
                 state
                 createdAt
             }
         }
         """
-        return self.execute(query, {"stackId": stack_id, "commitSha": commit_sha})['runTrigger']
+        run = self.execute(query, {
+            "stackId": stack_id,
+            "commitSha": commit_sha,
+            "runType": run_type
+        })['runTrigger']
+        self.invalidate_inventory()
+        return run
     
     def confirm_run(self, run_id: str) -> Dict:
         """Confirm/approve a run for apply"""
@@ -244,7 +305,9 @@ class SpaceLiftClient:
             }
         }
         """
-        return self.execute(query, {"id": stack_id, "note": note})['stackLock']
+        result = self.execute(query, {"id": stack_id, "note": note})['stackLock']
+        self.invalidate_inventory()
+        return result
     
     def unlock_stack(self, stack_id: str) -> Dict:
         """Unlock a stack"""
@@ -256,12 +319,15 @@ class SpaceLiftClient:
             }
         }
         """
-        return self.execute(query, {"id": stack_id})['stackUnlock']
+        result = self.execute(query, {"id": stack_id})['stackUnlock']
+        self.invalidate_inventory()
+        return result
     
     # ===== BATCH OPERATIONS =====
     
-    def trigger_environment_deployment(self, environment: str) -> List[Dict]:
-        """Trigger runs for all stacks in an environment"""
+    def trigger_environment_deployment(self, environment: str, out=None) -> List[Dict]:
+        """Trigger runs for all stacks in an environment, reporting progress to `out`"""
+        out = out or sys.stdout
         stacks = self.get_stacks_by_label(environment)
         results = []
         
@@ -274,7 +340,7 @@ class SpaceLiftClient:
                     "run_id": run['id'],
                     "status": "triggered"
                 })
-                print(f"✅ Triggered run for {stack['name']}: {run['id']}")
+                print(f"✅ Triggered run for {stack['name']}: {run['id']}", file=out)
             except Exception as e:
                 results.append({
                     "stack": stack['name'],
@@ -282,18 +348,18 @@ class SpaceLiftClient:
                     "error": str(e),
                     "status": "failed"
                 })
-                print(f"❌ Failed to trigger {stack['name']}: {e}")
+                print(f"❌ Failed to trigger {stack['name']}: {e}", file=out)
         
         return results
     
     def get_environment_status(self, environment: str) -> Dict:
         """Get health status for an environment"""
-        stacks = self.get_stacks_by_label(environment)
+        stacks = [s for s in self.list_stack_models() if environment in s.labels]
         
-        healthy = sum(1 for s in stacks if s['state'] == 'FINISHED')
-        failed = sum(1 for s in stacks if s['state'] == 'FAILED')
-        running = sum(1 for s in stacks if s['state'] in ['QUEUED', 'PREPARING', 'RUNNING'])
-        locked = sum(1 for s in stacks if s.get('lockedBy'))
+        healthy = sum(1 for s in stacks if s.state == 'FINISHED')
+        failed = sum(1 for s in stacks if s.state == 'FAILED')
+        running = sum(1 for s in stacks if s.state in ACTIVE_STATES)
+        locked = sum(1 for s in stacks if s.locked)
         
         return {
             "environment": environment,
@@ -304,52 +370,117 @@ class SpaceLiftClient:
             "locked": locked,
             "health_percentage": round((healthy / len(stacks)) * 100, 1) if stacks else 0,
             "stacks": [{
-                "name": s['name'],
-                "state": s['state'],
-                "locked": bool(s.get('lockedBy'))
+                "name": s.name,
+                "state": s.state,
+                "locked": s.locked
             } for s in stacks]
         }
 
 
+_default_client: Optional[SpaceLiftClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> SpaceLiftClient:
+    """Shared client, constructed on first use rather than at import time"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = SpaceLiftClient()
+    return _default_client
+
+
 # CLI usage
-if __name__ == "__main__":
-    import sys
+USAGE = {
+    "list-stacks": "list-stacks",
+    "get-stack": "get-stack <stack-id>",
+    "trigger-run": "trigger-run <stack-id>",
+    "status": "status <environment>",
+    "deploy": "deploy <environment>",
+    "lock": "lock <label|space:NAME> [note]",
+    "unlock": "unlock <label|space:NAME>",
+}
+
+
+def run_command(argv: List[str], client: Optional[SpaceLiftClient] = None, out=None) -> int:
+    """Execute one CLI command, writing output to `out`"""
+    out = out or sys.stdout
     
-    client = SpaceLiftClient()
+    if not argv:
+        print("Usage: python spacelift_client.py <command> [args]", file=out)
+        print(f"Commands: {', '.join(USAGE)}", file=out)
+        return 1
     
-    if len(sys.argv) < 2:
-        print("Usage: python spacelift_client.py <command> [args]")
-        print("Commands: list-stacks, get-stack, trigger-run, status")
-        sys.exit(1)
+    command, args = argv[0], argv[1:]
+    if command not in USAGE:
+        print(f"Unknown command: {command}", file=out)
+        return 1
+    if command != "list-stacks" and not args:
+        print(f"Usage: python spacelift_client.py {USAGE[command]}", file=out)
+        return 1
     
-    command = sys.argv[1]
+    # Only commands that actually reach the API pay for requests + auth
+    client = client or get_client()
     
     if command == "list-stacks":
         stacks = client.list_stacks()
         for s in stacks:
-            print(f"{s['name']}: {s['state']} (space: {s.get('space', {}).get('name', 'root')})")
+            print(f"{s['name']}: {s['state']} (space: {(s.get('space') or {}).get('name', 'root')})", file=out)
     
     elif command == "get-stack":
-        if len(sys.argv) < 3:
-            print("Usage: python spacelift_client.py get-stack <stack-id>")
-            sys.exit(1)
-        stack = client.get_stack(sys.argv[2])
-        print(json.dumps(stack, indent=2))
+        stack = client.get_stack(args[0])
+        print(json.dumps(stack, indent=2), file=out)
     
     elif command == "trigger-run":
-        if len(sys.argv) < 3:
-            print("Usage: python spacelift_client.py trigger-run <stack-id>")
-            sys.exit(1)
-        run = client.trigger_run(sys.argv[2])
-        print(f"Triggered run: {run['id']}")
+        run = client.trigger_run(args[0])
+        print(f"Triggered run: {run['id']}", file=out)
     
     elif command == "status":
-        if len(sys.argv) < 3:
-            print("Usage: python spacelift_client.py status <environment>")
-            sys.exit(1)
-        status = client.get_environment_status(sys.argv[2])
-        print(json.dumps(status, indent=2))
-    
-    else:
-        print(f"Unknown command: {command}")
-        sys.exit(1)
\ No newline at end of file
+        status = client.get_environment_status(args[0])
+        print(json.dumps(status, indent=2), file=out)
+    
+    elif command == "deploy":
+        results = client.trigger_environment_deployment(args[0], out=out)
+        print("\n=== Deployment Results ===", file=out)
+        for r in results:
+            if r['status'] == 'triggered':
+                print(f"✅ {r['stack']}: Run {r['run_id']}", file=out)
+            else:
+                print(f"❌ {r['stack']}: {r.get('error', 'Unknown error')}", file=out)
+    
+    elif command in ("lock", "unlock"):
+        from bulk_locks import BulkLockError, BulkLockManager
+        manager = BulkLockManager(client)
+        target = args[0]
+        if target.startswith("space:"):
+            stacks = manager.stacks_by_space(target[len("space:"):])
+        else:
+            stacks = manager.stacks_by_label(target)
+        
+        try:
+            if command == "lock":
+                result = manager.lock_stacks(stacks, note=" ".join(args[1:]) or "Maintenance window")
+            else:
+                result = manager.unlock_stacks(stacks)
+        except BulkLockError as e:
+            print(f"❌ {e}", file=out)
+            for stack_id, error in e.result.failed.items():
+                print(f"  {stack_id}: {error}", file=out)
+            return 1
+        
+        print(f"✅ {command.capitalize()}ed {len(result.succeeded)} stacks", file=out)
+        for stack_id, error in result.failed.items():
+            print(f"❌ {stack_id}: {error}", file=out)
+        return 1 if result.failed else 0
+    
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Console entry point: `spacelift = spacelift_client:main`"""
+    return run_command(sys.argv[1:] if argv is None else argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+# api-integration/tfstate_reader.py
+"""
+Offline inventory of managed Spacelift objects, read from a tfstate file.
+
+The state is parsed incrementally: only one resource object is decoded at a
+time, from fixed-size chunks of the file (memory-mapped for large files),
+so memory stays flat however big the state gets. The resulting
+StateInventory indexes stacks, labels, spaces, contexts and policy
+attachments, and can be diffed against the live API.
+
+    python tfstate_reader.py ../admin-stack/terraform.tfstate
+    python tfstate_reader.py ../admin-stack/terraform.tfstate --diff
+"""
+
+import codecs
+import json
+import mmap
+import os
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set
+
+CHUNK_SIZE = 1 << 20
+MMAP_THRESHOLD = 16 << 20  # files larger than this are memory-mapped
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+class _JSONStream:
+    """Pull-based JSON tokenizer over a chunked source"""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            self.buf += self._decoder.decode(b'', final=True)
+            return False
+        # Drop consumed text so the buffer only ever holds the current value
+        self.buf = self.buf[self.pos:] + self._decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of state file")
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buf, self.pos)
+                # A number cut at the end of the buffer ("12", "1.", "1e") may
+                # continue in the next chunk; only a delimiter proves it's complete
+                if self.eof or (end < len(self.buf) and self.buf[end] not in _NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def _file_chunks(path: str) -> Iterator[bytes]:
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset in range(0, size, CHUNK_SIZE):
+                    yield mapped[offset:offset + CHUNK_SIZE]
+        else:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+
+def iter_resources(path: str) -> Iterator[Dict]:
+    """Yield top-level `resources` entries one at a time; other keys are skipped"""
+    stream = _JSONStream(_file_chunks(path))
+    stream.expect('{')
+    while stream.peek() != '}':
+        key = stream.value()
+        stream.expect(':')
+        if key != 'resources':
+            stream.value()
+        else:
+            stream.expect('[')
+            while stream.peek() != ']':
+                yield stream.value()
+                if stream.peek() == ',':
+                    stream.pos += 1
+            stream.pos += 1
+        if stream.peek() == ',':
+            stream.pos += 1
+
+
+@dataclass
+class StateInventory:
+    stacks: Dict[str, Dict] = field(default_factory=dict)
+    spaces: Dict[str, Dict] = field(default_factory=dict)
+    contexts: Dict[str, Dict] = field(default_factory=dict)
+    policies: Dict[str, Dict] = field(default_factory=dict)
+    by_label: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
+    stack_policies: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
+    space_policies: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
+    stack_contexts: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
+
+    @classmethod
+    def from_state(cls, path: str) -> 'StateInventory':
+        inventory = cls()
+        for resource in iter_resources(path):
+            if resource.get('mode') != 'managed':
+                continue
+            for instance in resource.get('instances', []):
+                inventory._add(resource['type'], resource.get('module'), instance['attributes'])
+        return inventory
+
+    def _add(self, res_type: str, module: Optional[str], attrs: Dict):
+        if res_type == 'spacelift_stack':
+            self.stacks[attrs['id']] = {
+                "id": attrs['id'],
+                "name": attrs.get('name'),
+                "labels": attrs.get('labels') or [],
+                "space_id": attrs.get('space_id') or 'root',
+                "branch": attrs.get('branch'),
+                "project_root": attrs.get('project_root'),
+                "autodeploy": attrs.get('autodeploy'),
+                "module": module
+            }
+            for label in attrs.get('labels') or []:
+                self.by_label[label].add(attrs['id'])
+        elif res_type == 'spacelift_space':
+            self.spaces[attrs['id']] = {
+                "id": attrs['id'],
+                "name": attrs.get('name'),
+                "parent_space_id": attrs.get('parent_space_id'),
+                "inherit_entities": attrs.get('inherit_entities', False)
+            }
+        elif res_type == 'spacelift_context':
+            self.contexts[attrs['id']] = {"id": attrs['id'], "name": attrs.get('name')}
+        elif res_type == 'spacelift_policy':
+            self.policies[attrs['id']] = {
+                "id": attrs['id'],
+                "name": attrs.get('name'),
+                "type": attrs.get('type')
+            }
+        elif res_type == 'spacelift_policy_attachment':
+            if attrs.get('stack_id'):
+                self.stack_policies[attrs['stack_id']].add(attrs['policy_id'])
+            elif attrs.get('space_id'):
+                self.space_policies[attrs['space_id']].add(attrs['policy_id'])
+        elif res_type == 'spacelift_context_attachment':
+            self.stack_contexts[attrs['stack_id']].add(attrs['context_id'])
+
+    def stacks_with_label(self, label: str) -> List[Dict]:
+        return [self.stacks[i] for i in self.by_label.get(label, ())]
+
+    def effective_policies(self, stack_id: str) -> Set[str]:
+        """Policies attached to the stack directly or via its space chain"""
+        policies = set(self.stack_policies.get(stack_id, ()))
+        space_id = self.stacks[stack_id]['space_id']
+        seen = set()
+        while space_id and space_id not in seen:
+            seen.add(space_id)
+            policies |= self.space_policies.get(space_id, set())
+            space = self.spaces.get(space_id)
+            if space_id == 'root' or space is None or not space['inherit_entities']:
+                break
+            space_id = space['parent_space_id']
+        return policies
+
+    def as_scanner_stacks(self) -> List[Dict]:
+        """Stacks in the shape ComplianceScanner checks expect (no live run data)"""
+        return [{
+            "id": stack['id'],
+            "name": stack['name'],
+            "labels": stack['labels'],
+            "state": None,
+            "lockedBy": None,
+            "attachedPolicies": [
+                {"id": p, "name": self.policies.get(p, {}).get('name', p)}
+                for p in sorted(self.effective_policies(stack['id']))
+            ],
+            "runs": []
+        } for stack in self.stacks.values()]
+
+    def diff(self, live_stacks: List[Dict]) -> Dict:
+        """Compare declared stacks with the API's `list_stacks()` output"""
+        live = {s['id']: s for s in live_stacks}
+        declared_ids, live_ids = set(self.stacks), set(live)
+
+        label_drift = {}
+        for stack_id in declared_ids & live_ids:
+            declared_labels = set(self.stacks[stack_id]['labels'])
+            live_labels = set(live[stack_id].get('labels') or [])
+            if declared_labels != live_labels:
+                label_drift[stack_id] = {
+                    "missing": sorted(declared_labels - live_labels),
+                    "unexpected": sorted(live_labels - declared_labels)
+                }
+
+        return {
+            "missing_in_api": sorted(declared_ids - live_ids),
+            "unmanaged_in_api": sorted(live_ids - declared_ids),
+            "label_drift": label_drift
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: python tfstate_reader.py <terraform.tfstate> [--diff]")
+        return 1
+
+    inventory = StateInventory.from_state(argv[0])
+    print(f"Stacks:   {len(inventory.stacks)}")
+    print(f"Spaces:   {len(inventory.spaces)}")
+    print(f"Contexts: {len(inventory.contexts)}")
+    print(f"Policies: {len(inventory.policies)}")
+    for stack in sorted(inventory.stacks.values(), key=lambda s: s['name']):
+        policies = inventory.effective_policies(stack['id'])
+        print(f"  {stack['name']}: {len(policies)} policies, labels {', '.join(stack['labels'])}")
+
+    if '--diff' in argv:
+        from spacelift_client import get_client
+        print(json.dumps(inventory.diff(get_client().list_stacks()), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
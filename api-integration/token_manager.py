@@ -0,0 +1,225 @@
+# api-integration/token_manager.py
+
+import base64
+import json
+import os
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process file locking
+    fcntl = None
+
+
+def decode_jwt_expiry(token: str) -> Optional[float]:
+    """Return the `exp` claim of a JWT as a unix timestamp (no signature check)"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenCache:
+    """Share a JWT between processes through a user-only cache file"""
+
+    def __init__(self, path: str, identity: str):
+        self.path = path
+        self.identity = identity
+
+    def load(self) -> Optional[Tuple[str, float]]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('identity') != self.identity:
+            return None
+        return data['jwt'], float(data['expires_at'])
+
+    def store(self, token: str, expires_at: float):
+        import tempfile  # only needed by the process that mints the token
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.token-')
+        try:
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({
+                    'identity': self.identity,
+                    'jwt': token,
+                    'expires_at': expires_at
+                }, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def lock(self) -> 'FileLock':
+        """Exclusive lock so only one process mints a token at a time"""
+        return FileLock(f"{self.path}.lock")
+
+
+class FileLock:
+    """Exclusive advisory lock on `path` (no-op where fcntl is unavailable)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class TokenManager:
+    """
+    Keeps a valid JWT available without blocking the request path.
+
+    The token is refreshed by a background thread `refresh_margin` seconds
+    before its real `exp` claim (at most half-way through the token's
+    lifetime, for short-lived tokens or skewed clocks), and never more often
+    than every `min_refresh_interval` seconds. Refreshes are single-flight:
+    concurrent callers never issue duplicate `apiKeyUser` mutations. Callers
+    only block when there is no unexpired token at all (first use, or after
+    a long sleep).
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], str],
+        refresh_margin: int = 300,
+        fallback_ttl: int = 3000,
+        cache: Optional[TokenCache] = None,
+        min_refresh_interval: float = 30
+    ):
+        self._fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.fallback_ttl = fallback_ttl
+        self.cache = cache
+        self.min_refresh_interval = min_refresh_interval
+
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._lifetime: Optional[float] = None
+        self._last_refresh = 0.0
+        self._rejected: Optional[str] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def expires_at(self) -> float:
+        return self._expires_at
+
+    def get_token(self) -> str:
+        """Return a valid token, refreshing synchronously only if none is usable"""
+        token, expires_at = self._token, self._expires_at
+        now = time.time()
+
+        if token and now < expires_at:
+            if now >= self._refresh_at:
+                self._wakeup.set()
+            return token
+
+        with self._lock:
+            # Another thread may have refreshed while we waited. A token minted
+            # moments ago is used even if a skewed clock says it has expired.
+            now = time.time()
+            if self._token and (now < self._expires_at or now - self._last_refresh < self.min_refresh_interval):
+                return self._token
+            self._refresh_locked()
+            self._ensure_thread()
+            return self._token
+
+    def prefetch(self):
+        """Mint the first token in the background so the first request need not wait"""
+        with self._lock:
+            self._ensure_thread()
+
+    def invalidate(self, token: Optional[str] = None):
+        """Drop a token the API rejected (default: the current one) so it is never reused"""
+        with self._lock:
+            self._rejected = token or self._token
+            # A concurrent refresh may already have replaced the rejected token
+            if self._token == self._rejected:
+                self._token = None
+                self._expires_at = self._refresh_at = 0.0
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _refresh_locked(self):
+        self._last_refresh = time.time()
+        if self.cache is None:
+            self._set(self._fetch())
+            return
+
+        with self.cache.lock():
+            cached = self.cache.load()
+            # Another process may not have noticed the token was revoked yet
+            if cached and cached[0] != self._rejected and time.time() < cached[1] - self._margin(cached[1]):
+                self._adopt(*cached)
+                return
+            self._set(self._fetch())
+            self.cache.store(self._token, self._expires_at)
+
+    def _margin(self, expires_at: float) -> float:
+        """refresh_margin, capped at half the token's lifetime so short-lived tokens aren't always due"""
+        lifetime = self._lifetime if self._lifetime is not None else expires_at - time.time()
+        return min(self.refresh_margin, max(lifetime, 0) / 2)
+
+    def _set(self, token: str):
+        now = time.time()
+        expires_at = decode_jwt_expiry(token) or now + self.fallback_ttl
+        self._lifetime = expires_at - now
+        self._adopt(token, expires_at)
+
+    def _adopt(self, token: str, expires_at: float):
+        self._token = token
+        self._expires_at = expires_at
+        self._refresh_at = expires_at - self._margin(expires_at)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name='spacelift-token-refresh', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            due = max(self._refresh_at, self._last_refresh + self.min_refresh_interval)
+            delay = due - time.time()
+            if delay > 0:
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+                continue
+
+            try:
+                with self._lock:
+                    if time.time() >= self._refresh_at:
+                        self._refresh_locked()
+            except Exception as e:
+                print(f"⚠️  Token refresh failed, retrying in 30s: {e}")
+                self._wakeup.wait(30)
+                self._wakeup.clear()
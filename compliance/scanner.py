@@ -1,8 +1,8 @@
 # compliance/scanner.py
 
+import os
 import sys
-sys.path.append('../api-integration')
-from spacelift_client import SpaceLiftClient
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api-integration'))
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Callable
 from datetime import datetime, timedelta
@@ -24,13 +24,43 @@ class ComplianceCheck:
     description: str
     severity: str
     checker: Callable
+    offline: bool = False  # can run against tfstate alone (no live run/lock data)
+
+STALE_LOCK_AGE = timedelta(hours=24)
+MAX_DRIFT_CHECK_AGE = timedelta(days=7)
 
 class ComplianceScanner:
-    def __init__(self):
-        self.client = SpaceLiftClient()
+    def __init__(self, client=None, lock_ledger=None, drift_state=None, state_path: Optional[str] = None):
+        self._client = client
+        self.state_path = state_path  # scan a tfstate file offline instead of the API
+        self._lock_ledger = lock_ledger
+        self._lock_entries: Optional[Dict[str, Dict]] = None
+        self._drift_state = drift_state
         self.checks: List[ComplianceCheck] = []
         self._register_default_checks()
     
+    @property
+    def client(self):
+        """SpaceLiftClient, created (and `requests` imported) on first API call"""
+        if self._client is None:
+            from spacelift_client import get_client
+            self._client = get_client()
+        return self._client
+    
+    @property
+    def lock_ledger(self):
+        if self._lock_ledger is None:
+            from bulk_locks import LockLedger
+            self._lock_ledger = LockLedger()
+        return self._lock_ledger
+    
+    @property
+    def lock_entries(self) -> Dict[str, Dict]:
+        """Lock ledger entries (stack_id -> locked_at/locked_by/note), read once per scan"""
+        if self._lock_entries is None:
+            self._lock_entries = self.lock_ledger.entries()
+        return self._lock_entries
+    
     def _register_default_checks(self):
         """Register all default compliance checks"""
         
@@ -47,7 +77,8 @@ class ComplianceScanner:
             name="policy-attached",
             description="All stacks must have at least one policy attached",
             severity="critical",
-            checker=self._check_policy_attachment
+            checker=self._check_policy_attachment,
+            offline=True
         ))
         
         # Check 3: No stale locks
@@ -98,11 +129,35 @@ class ComplianceScanner:
         """
         return self.client.execute(query)['stacks']
     
+    @property
+    def drift_state(self):
+        """Drift scheduler state (exact last-checked times), read once per scan"""
+        if self._drift_state is None:
+            from drift_scheduler import DriftScheduleState
+            self._drift_state = DriftScheduleState()
+        return self._drift_state
+    
     def _check_drift_detection(self, stack: Dict) -> Optional[ComplianceViolation]:
         """Check if production stacks have drift detection"""
         if 'production' not in stack.get('labels', []):
             return None
         
+        last_checked = self.drift_state.last_checked(stack['id'])
+        if last_checked is not None:
+            age = datetime.now(last_checked.tzinfo) - last_checked
+            if age <= MAX_DRIFT_CHECK_AGE:
+                return None
+            return ComplianceViolation(
+                check_name="production-drift-detection",
+                severity="high",
+                stack_id=stack['id'],
+                stack_name=stack['name'],
+                description=f"Last drift check was {age.days} days ago",
+                details={"last_checked": last_checked.isoformat()},
+                timestamp=datetime.now()
+            )
+        
+        # Stack not covered by the drift scheduler: fall back to recent runs
         # Note: Would need additional query for drift settings
         # Simplified check based on recent drift runs
         runs = stack.get('runs', [])
@@ -137,17 +192,40 @@ class ComplianceScanner:
         return None
     
     def _check_stale_locks(self, stack: Dict) -> Optional[ComplianceViolation]:
-        """Check for stacks that have been locked"""
-        if stack.get('lockedBy'):
+        """Check for stacks locked longer than STALE_LOCK_AGE (age from the lock ledger)"""
+        if not stack.get('lockedBy'):
+            return None
+        
+        entry = self.lock_entries.get(stack['id'])
+        if entry is None or entry.get('locked_by') != stack['lockedBy']:
+            # Locked outside our tooling (or re-locked since): age unknown, report as before
             return ComplianceViolation(
                 check_name="no-stale-locks",
                 severity="medium",
                 stack_id=stack['id'],
                 stack_name=stack['name'],
-                description="Stack is currently locked",
+                description="Stack is currently locked (lock age unknown)",
                 details={"locked_by": stack['lockedBy']},
                 timestamp=datetime.now()
             )
+        
+        locked_at = datetime.fromisoformat(entry['locked_at'])
+        age = datetime.now(locked_at.tzinfo) - locked_at
+        if age > STALE_LOCK_AGE:
+            return ComplianceViolation(
+                check_name="no-stale-locks",
+                severity="medium",
+                stack_id=stack['id'],
+                stack_name=stack['name'],
+                description=f"Stack has been locked for {age.total_seconds() / 3600:.1f} hours",
+                details={
+                    "locked_by": stack['lockedBy'],
+                    "locked_at": entry['locked_at'],
+                    "age_hours": round(age.total_seconds() / 3600, 1),
+                    "note": entry.get('note', '')
+                },
+                timestamp=datetime.now()
+            )
         return None
     
     def _check_recent_deployment(self, stack: Dict) -> Optional[ComplianceViolation]:
@@ -201,13 +279,23 @@ class ComplianceScanner:
     def scan(self, label_filter: Optional[str] = None) -> List[ComplianceViolation]:
         """Run all compliance checks"""
         violations = []
-        stacks = self._get_detailed_stacks()
+        if self.state_path:
+            from tfstate_reader import StateInventory
+            stacks = StateInventory.from_state(self.state_path).as_scanner_stacks()
+            checks = [c for c in self.checks if c.offline]
+        else:
+            stacks = self._get_detailed_stacks()
+            checks = self.checks
+        # Re-read the lock ledger for this scan, dropping locks released since
+        self._lock_entries = None if self.state_path else self.lock_ledger.reconcile(stacks)
+        if self._drift_state is not None:
+            self._drift_state.reload()
         
         if label_filter:
             stacks = [s for s in stacks if label_filter in s.get('labels', [])]
         
         for stack in stacks:
-            for check in self.checks:
+            for check in checks:
                 violation = check.checker(stack)
                 if violation:
                     violations.append(violation)
@@ -290,10 +378,18 @@ def generate_report(scanner: ComplianceScanner, format: str = "text") -> str:
     return "\n".join(lines)
 
 
-if __name__ == "__main__":
-    scanner = ComplianceScanner()
+def main(argv: Optional[List[str]] = None) -> int:
+    """Console entry point: `spacelift-compliance = scanner:main`"""
+    argv = sys.argv[1:] if argv is None else argv
+    
+    # --state PATH: run offline-capable checks against a tfstate file
+    state_path = argv[argv.index('--state') + 1] if '--state' in argv else None
+    scanner = ComplianceScanner(state_path=state_path)
     
-    print("Running compliance scan...\n")
+    if state_path:
+        print(f"Running offline compliance scan against {state_path}...\n")
+    else:
+        print("Running compliance scan...\n")
     report = generate_report(scanner, format="text")
     print(report)
     
@@ -302,3 +398,8 @@ if __name__ == "__main__":
     with open("compliance_report.json", "w") as f:
         f.write(json_report)
     print("\nJSON report saved to compliance_report.json")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,25 @@
 # dashboard/app.py
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request
+import os
 import sys
-sys.path.append('../api-integration')
-from spacelift_client import SpaceLiftClient, SpaceLiftConfig
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api-integration'))
+from spacelift_client import get_client
+from models import ACTIVE_STATES, Run
 import time
 from functools import wraps
 
 app = Flask(__name__)
-client = SpaceLiftClient()
+
+_history = None
+
+def get_history():
+    """Local run-history store (see api-integration/run_history.py), opened on first use"""
+    global _history
+    if _history is None:
+        from run_history import RunHistory
+        _history = RunHistory()
+    return _history
 
 # Simple in-memory cache
 cache = {}
@@ -19,7 +30,7 @@ def cached(ttl=CACHE_TTL):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
+            key = f"{func.__name__}:{str(args)}:{str(kwargs)}:{request.query_string.decode()}"
             now = time.time()
             
             if key in cache and now - cache_timestamps.get(key, 0) < ttl:
@@ -40,13 +51,13 @@ def index():
 @cached(ttl=30)
 def api_overview():
     """System overview metrics"""
-    stacks = client.list_stacks()
+    stacks = get_client().list_stack_models()
     
     total = len(stacks)
-    healthy = sum(1 for s in stacks if s['state'] == 'FINISHED')
-    failed = sum(1 for s in stacks if s['state'] == 'FAILED')
-    running = sum(1 for s in stacks if s['state'] in ['QUEUED', 'PREPARING', 'RUNNING'])
-    locked = sum(1 for s in stacks if s.get('lockedBy'))
+    healthy = sum(1 for s in stacks if s.state == 'FINISHED')
+    failed = sum(1 for s in stacks if s.state == 'FAILED')
+    running = sum(1 for s in stacks if s.state in ACTIVE_STATES)
+    locked = sum(1 for s in stacks if s.locked)
     
     return jsonify({
         'total_stacks': total,
@@ -61,14 +72,14 @@ def api_overview():
 @cached(ttl=30)
 def api_stacks():
     """All stacks with status"""
-    stacks = client.list_stacks()
+    stacks = get_client().list_stack_models()
     return jsonify([{
-        'id': s['id'],
-        'name': s['name'],
-        'state': s['state'],
-        'space': s.get('space', {}).get('name', 'root'),
-        'labels': s.get('labels', []),
-        'locked': bool(s.get('lockedBy'))
+        'id': s.id,
+        'name': s.name,
+        'state': s.state,
+        'space': s.space_name,
+        'labels': sorted(s.labels),
+        'locked': s.locked
     } for s in stacks])
 
 @app.route('/api/environments')
@@ -79,7 +90,7 @@ def api_environments():
     results = []
     
     for env in environments:
-        status = client.get_environment_status(env)
+        status = get_client().get_environment_status(env)
         results.append(status)
     
     return jsonify(results)
@@ -91,6 +102,7 @@ def api_recent_runs():
     query = """
     query {
         stacks {
+            id
             name
             runs(first: 3) {
                 id
@@ -104,31 +116,61 @@ def api_recent_runs():
         }
     }
     """
-    data = client.execute(query)
+    data = get_client().execute(query)
     
-    all_runs = []
-    for stack in data['stacks']:
-        for run in stack.get('runs', []):
-            run['stackName'] = stack['name']
-            all_runs.append(run)
+    # Feed the trend store from data we already fetched; it must never break the live view
+    try:
+        get_history().record_stacks(data['stacks'])
+    except Exception as e:
+        app.logger.warning("Could not record run history: %s", e)
     
-    all_runs.sort(key=lambda r: r['createdAt'], reverse=True)
-    return jsonify(all_runs[:30])
+    runs = [
+        (stack['name'], Run.from_api(run))
+        for stack in data['stacks']
+        for run in stack.get('runs') or ()
+    ]
+    runs.sort(key=lambda r: r[1].created_at or '', reverse=True)
+    return jsonify([dict(run.to_dict(), stackName=name) for name, run in runs[:30]])
+
+@app.route('/api/trends')
+@cached(ttl=60)
+def api_trends():
+    """Deployment frequency, failure rates and MTTR from the local run history"""
+    days = request.args.get('days', 30, type=int)
+    history = get_history()
+    return jsonify({
+        'summary': history.summary(days),
+        'deployments_per_day': history.deployment_frequency(days),
+        'failure_rates': history.failure_rates(days)[:10]
+    })
+
+@app.route('/api/policy-hotspots')
+@cached(ttl=60)
+def api_policy_hotspots():
+    """Policies and deny messages blocking the most runs (aggregated receipts)"""
+    from receipt_analytics import ReceiptAggregator
+    days = request.args.get('days', 30, type=int)
+    aggregator = ReceiptAggregator()
+    return jsonify({
+        'policies': aggregator.by_policy(days),
+        'hot_spots': aggregator.hot_spots(days, limit=10)
+    })
 
 @app.route('/api/stack/<stack_id>')
 def api_stack_detail(stack_id):
     """Detailed stack information"""
-    stack = client.get_stack(stack_id)
+    stack = get_client().get_stack(stack_id)
     return jsonify(stack)
 
 @app.route('/api/stack/<stack_id>/trigger', methods=['POST'])
 def api_trigger_run(stack_id):
     """Trigger a run for a stack"""
     try:
-        run = client.trigger_run(stack_id)
+        run = get_client().trigger_run(stack_id)
         return jsonify({"success": True, "run": run})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 if __name__ == '__main__':
+    get_client().tokens.prefetch()  # authenticate before the first request arrives
     app.run(host='0.0.0.0', port=8080, debug=True)
\ No newline at end of file
@@ -0,0 +1,9 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# The tooling modules import each other as top-level modules (see scanner.py/app.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api-integration'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'compliance'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api-integration', 'scripts'))
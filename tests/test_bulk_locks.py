@@ -0,0 +1,152 @@
+# tests/test_bulk_locks.py
+
+import re
+from datetime import datetime, timezone
+
+import pytest
+
+from bulk_locks import BulkLockError, BulkLockManager, LockLedger
+from models import Stack
+from scanner import STALE_LOCK_AGE, ComplianceScanner
+
+ALIAS_RE = re.compile(r'(s\d+): (\w+)\(id: \$(id\d+)')
+
+
+class StubClient:
+    """Applies aliased stackLock/stackUnlock mutations to an in-memory lock set"""
+
+    def __init__(self, count=120, fail_lock=(), raise_on=()):
+        self.count = count
+        self.locked = set()
+        self.fail_lock = set(fail_lock)   # stacks whose lock returns a GraphQL error
+        self.raise_on = set(raise_on)     # stacks whose batch request raises *after* applying
+        self.unlock_calls = []
+
+    def list_stack_models(self):
+        return [Stack.from_api({
+            'id': f"st{i}",
+            'name': f"st{i}",
+            'state': 'FINISHED',
+            'labels': ['production'],
+            'lockedBy': 'someone' if f"st{i}" in self.locked else None,
+            'space': {'id': 'prod', 'name': 'production'}
+        }) for i in range(self.count)]
+
+    def invalidate_inventory(self):
+        pass
+
+    def execute_partial(self, query, variables):
+        data, errors, raise_after = {}, [], False
+        for alias, mutation, var in ALIAS_RE.findall(query):
+            stack_id = variables[var]
+            if mutation == 'stackLock':
+                if stack_id in self.fail_lock:
+                    data[alias] = None
+                    errors.append({'path': [alias], 'message': 'boom'})
+                    continue
+                self.locked.add(stack_id)
+                raise_after |= stack_id in self.raise_on
+                data[alias] = {'id': stack_id, 'lockedBy': 'api::ci-bot'}
+            else:
+                self.unlock_calls.append(stack_id)
+                self.locked.discard(stack_id)
+                data[alias] = {'id': stack_id, 'lockedBy': None}
+        if raise_after:
+            raise TimeoutError("read timed out")
+        return data, errors
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return LockLedger(str(tmp_path / 'locks.json'))
+
+
+def test_lock_by_label_records_ledger(ledger):
+    client = StubClient(count=120)
+    manager = BulkLockManager(client, ledger, batch_size=50)
+
+    result = manager.lock_by_label('production', 'maintenance')
+
+    assert result.ok and len(result.succeeded) == 120
+    assert len(client.locked) == 120
+    assert ledger.get('st7')['note'] == 'maintenance'
+    assert ledger.get('st7')['locked_by'] == 'api::ci-bot'
+
+
+def test_graphql_error_rolls_back_partial_set(ledger):
+    client = StubClient(count=120, fail_lock={'st77'})
+    manager = BulkLockManager(client, ledger, batch_size=50)
+
+    with pytest.raises(BulkLockError) as exc:
+        manager.lock_by_label('production')
+
+    assert exc.value.result.failed == {'st77': 'boom'}
+    assert len(exc.value.result.rolled_back) == 119
+    assert client.locked == set()
+    assert ledger.entries() == {}
+
+
+def test_raised_batch_is_included_in_rollback(ledger):
+    # The middle batch (st50-st99) is applied server-side but the request times out
+    client = StubClient(count=120, raise_on={'st60'})
+    manager = BulkLockManager(client, ledger, batch_size=50)
+
+    with pytest.raises(BulkLockError) as exc:
+        manager.lock_by_label('production')
+
+    result = exc.value.result
+    assert len(result.failed) == 50
+    assert sorted(result.uncertain) == sorted(f"st{i}" for i in range(50, 100))
+    assert client.locked == set()
+    assert ledger.entries() == {}
+
+
+def test_already_locked_aborts_before_mutating(ledger):
+    client = StubClient(count=10)
+    client.locked.add('st3')
+    manager = BulkLockManager(client, ledger)
+
+    with pytest.raises(BulkLockError):
+        manager.lock_by_label('production')
+
+    assert client.locked == {'st3'}
+    assert client.unlock_calls == []
+
+
+def test_maintenance_window_unlocks_afterwards(ledger):
+    client = StubClient(count=5)
+    manager = BulkLockManager(client, ledger)
+
+    with manager.maintenance_window(manager.stacks_by_space('production')) as result:
+        assert len(client.locked) == 5
+        assert len(result.succeeded) == 5
+
+    assert client.locked == set()
+    assert ledger.entries() == {}
+
+
+def test_reconcile_drops_released_and_relocked_entries(ledger):
+    client = StubClient(count=3)
+    BulkLockManager(client, ledger).lock_by_label('production')
+
+    kept = ledger.reconcile([
+        {'id': 'st0', 'lockedBy': 'api::ci-bot'},   # still our lock
+        {'id': 'st1', 'lockedBy': None},            # unlocked in the UI
+        {'id': 'st2', 'lockedBy': 'alice'},         # unlocked, then locked by someone else
+    ])
+    assert set(kept) == {'st0'}
+    assert set(ledger.entries()) == {'st0'}
+
+
+def test_stale_lock_age_only_from_matching_entry(ledger):
+    old = (datetime.now(timezone.utc) - STALE_LOCK_AGE * 2).isoformat()
+    ledger._save({
+        'mine': {'name': 'mine', 'note': '', 'locked_at': old, 'locked_by': 'api::ci-bot'},
+        'relocked': {'name': 'relocked', 'note': '', 'locked_at': old, 'locked_by': 'api::ci-bot'},
+    })
+    scanner = ComplianceScanner(client=object(), lock_ledger=ledger)
+
+    mine = scanner._check_stale_locks({'id': 'mine', 'name': 'mine', 'lockedBy': 'api::ci-bot'})
+    assert 'locked for 48.0 hours' in mine.description
+    relocked = scanner._check_stale_locks({'id': 'relocked', 'name': 'relocked', 'lockedBy': 'alice'})
+    assert relocked.description == "Stack is currently locked (lock age unknown)"
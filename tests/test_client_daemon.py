@@ -0,0 +1,56 @@
+# tests/test_client_daemon.py
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+import pytest
+
+import client_daemon
+import spacelift_client
+
+
+@pytest.fixture
+def socket_path(monkeypatch):
+    # AF_UNIX paths are length-limited, so not under pytest's tmp_path
+    directory = tempfile.mkdtemp(prefix='sl-')
+    path = os.path.join(directory, 'd.sock')
+    monkeypatch.setattr(client_daemon, 'DEFAULT_SOCKET', path)
+    yield path
+    shutil.rmtree(directory)
+
+
+@pytest.fixture
+def local_runs(monkeypatch):
+    calls = []
+    monkeypatch.setattr(spacelift_client, 'run_command', lambda argv: calls.append(argv) or 0)
+    return calls
+
+
+def test_falls_back_when_no_daemon(socket_path, local_runs):
+    assert client_daemon.main(['deploy', 'production']) == 0
+    assert local_runs == [['deploy', 'production']]
+
+
+def test_no_local_rerun_after_request_was_sent(socket_path, local_runs, capsys):
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(1)
+
+    def accept_and_drop():
+        conn, _ = server.accept()
+        conn.recv(4096)  # the daemon got the command, then died
+        conn.close()
+
+    thread = threading.Thread(target=accept_and_drop)
+    thread.start()
+    try:
+        assert client_daemon.main(['deploy', 'production']) == 1
+    finally:
+        thread.join()
+        server.close()
+
+    assert local_runs == []
+    assert "Lost connection" in capsys.readouterr().err
@@ -0,0 +1,86 @@
+# tests/test_plan_projects.py
+
+import os
+import time
+
+import plan_projects
+from plan_projects import PLATFORM, discover_targets, load_cached
+
+MAIN_TF = '''
+locals {
+  team = "web"
+}
+
+data "spacelift_current_space" "this" {}
+
+resource "spacelift_space" "platform" {
+  name = "platform"
+}
+
+resource "spacelift_space" "team" {
+  name            = local.team
+  parent_space_id = spacelift_space.platform.id
+}
+
+module "shared" {
+  source = "./modules/shared"
+}
+
+module "web_app" {
+  source   = "./modules/shared"
+  space_id = spacelift_space.team.id
+  region   = data.spacelift_current_space.this.id
+  shared   = module.shared.id
+}
+
+module "other" {
+  source = "./modules/shared"
+}
+
+output "team_space" {
+  value = spacelift_space.team.id
+}
+'''
+
+
+def _stack(tmp_path, main_tf=MAIN_TF):
+    (tmp_path / 'modules' / 'shared').mkdir(parents=True, exist_ok=True)
+    (tmp_path / 'modules' / 'shared' / 'main.tf').write_text('variable "space_id" { default = null }\n')
+    (tmp_path / 'versions.tf').write_text('terraform {\n}\n\nprovider "spacelift" {\n}\n')
+    (tmp_path / 'main.tf').write_text(main_tf)
+    return {t.name: t for t in discover_targets(str(tmp_path))}
+
+
+def test_dependencies_are_followed_transitively(tmp_path):
+    web_app = _stack(tmp_path)['web_app']
+    assert web_app.state_resources == ['spacelift_space.team', 'spacelift_space.platform']
+    assert web_app.state_modules == ['module.web_app', 'module.shared']
+    assert PLATFORM in _stack(tmp_path)
+
+
+def test_key_covers_locals_data_and_other_modules(tmp_path):
+    before = _stack(tmp_path)
+    for old, new in [('"web"', '"api"'),
+                     ('"spacelift_current_space" "this" {}', '"spacelift_current_space" "this" { x = 1 }'),
+                     ('module "shared" {', 'module "shared" {\n  count = 1')]:
+        after = _stack(tmp_path, MAIN_TF.replace(old, new))
+        assert after['web_app'].key({}) != before['web_app'].key({}), old
+        # An unrelated project keeps its cache
+        assert after['other'].key({}) == before['other'].key({}), old
+
+
+def test_key_depends_on_refresh(tmp_path):
+    web_app = _stack(tmp_path)['web_app']
+    assert web_app.key({}, refresh=True) != web_app.key({}, refresh=False)
+
+
+def test_refreshed_plans_expire(tmp_path, monkeypatch):
+    monkeypatch.setattr(plan_projects, 'CACHE_DIR', str(tmp_path))
+    target = _stack(tmp_path)['web_app']
+    path = tmp_path / f"{target.name}-abc.json"
+    path.write_text('{"resource_changes": []}')
+    stale = time.time() - 7200
+    os.utime(path, (stale, stale))
+
+    assert load_cached(target, 'abc') == {"resource_changes": []}
+    assert load_cached(target, 'abc', max_age=3600) is None
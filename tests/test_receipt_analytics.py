@@ -0,0 +1,57 @@
+# tests/test_receipt_analytics.py
+
+import pytest
+
+from receipt_analytics import ReceiptAggregator, message_template
+
+
+@pytest.mark.parametrize('message, template', [
+    ('Resource module.web_app.module.db.aws_db_instance.main[0] must be encrypted',
+     'Resource <address> must be encrypted'),
+    ('aws_security_group.web["ssh"] allows 0.0.0.0/0 on port 22', '<address> allows <cidr> on port <n>'),
+    ('Ingress from 10.20.0.1 is not allowed', 'Ingress from <cidr> is not allowed'),
+    ('Stack "prod-api" needs 2 approvals', 'Stack <value> needs <n> approvals'),
+])
+def test_message_template(message, template):
+    assert message_template(message) == template
+
+
+class StubClient:
+    def list_stacks(self):
+        return [{'id': 'ok'}, {'id': 'broken'}]
+
+    def get_stack(self, stack_id):
+        if stack_id == 'broken':
+            raise ConnectionError("reset by peer")
+        return {'runs': [{'id': 'run1', 'state': 'FAILED'}, {'id': 'run2', 'state': 'APPLYING'}]}
+
+    def get_run(self, run_id):
+        return {
+            'id': run_id,
+            'createdAt': 1700000000,
+            'policyReceipts': [{
+                'policy': {'name': 'security', 'type': 'PLAN'},
+                'outcome': 'deny',
+                'denies': ['aws_s3_bucket.logs is public', 'aws_s3_bucket.data is public']
+            }]
+        }
+
+
+def test_collect_skips_failing_stacks(tmp_path):
+    aggregator = ReceiptAggregator(str(tmp_path / 'history.sqlite3'))
+    assert aggregator.collect(StubClient()) == 1
+    assert aggregator.collect(StubClient()) == 0  # already counted
+
+    [spot] = aggregator.hot_spots(days=100000)
+    assert (spot['template'], spot['count'], spot['stacks']) == ('<address> is public', 2, 1)
+
+
+def test_ingest_receipt_without_policy(tmp_path):
+    aggregator = ReceiptAggregator(str(tmp_path / 'history.sqlite3'))
+    runs = [('s1', {'id': 'r1', 'createdAt': 1700000000,
+                    'policyReceipts': [{'policy': None, 'denies': ['x']}]})]
+    assert aggregator.ingest(runs) == 1
+    assert aggregator.ingest(runs) == 0
+
+    [spot] = aggregator.hot_spots(days=100000)
+    assert (spot['policy_name'], spot['template'], spot['count']) == ('<unknown>', 'x', 1)
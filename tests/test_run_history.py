@@ -0,0 +1,24 @@
+# tests/test_run_history.py
+
+from run_history import RunHistory
+
+
+def _run(run_id, state, created_at=1700000000):
+    return {'id': run_id, 'state': state, 'type': 'TRACKED', 'createdAt': created_at,
+            'delta': {'addCount': 1, 'changeCount': 0, 'deleteCount': 0}}
+
+
+def test_record_stacks_upserts_until_terminal(tmp_path):
+    history = RunHistory(str(tmp_path / 'history.sqlite3'))
+    assert history.record_stacks([
+        {'id': 'web', 'name': 'web', 'runs': [_run('r1', 'APPLYING'), _run('r2', 'FAILED')]},
+        {'id': 'api', 'name': 'api', 'runs': None},
+    ]) == 2
+
+    # r1 finishes and is updated; r2 is terminal and stays as first recorded
+    assert history.record_runs('web', 'web', [_run('r1', 'FINISHED'), _run('r2', 'FINISHED')]) == 1
+    assert history.known_terminal_runs(['r1', 'r2', 'r3']) == {'r1', 'r2'}
+    assert history._query("SELECT run_id, state FROM runs ORDER BY run_id") == [
+        {'run_id': 'r1', 'state': 'FINISHED'},
+        {'run_id': 'r2', 'state': 'FAILED'},
+    ]
@@ -0,0 +1,32 @@
+# tests/test_spacelift_client.py
+
+import io
+
+from spacelift_client import SpaceLiftClient, run_command
+
+
+class StubClient(SpaceLiftClient):
+    """Real command handling over canned stacks; no session or token manager"""
+
+    def __init__(self):
+        pass
+
+    def get_stacks_by_label(self, label):
+        return [{'id': 'web', 'name': 'web'}, {'id': 'api', 'name': 'api'}]
+
+    def trigger_run(self, stack_id, commit_sha=None, run_type=None):
+        if stack_id == 'api':
+            raise RuntimeError("stack is locked")
+        return {'id': f"run-{stack_id}"}
+
+
+def test_deploy_writes_only_to_out(capsys):
+    out = io.StringIO()
+    assert run_command(['deploy', 'production'], client=StubClient(), out=out) == 0
+
+    output = out.getvalue()
+    assert "✅ Triggered run for web: run-web" in output
+    assert "❌ Failed to trigger api: stack is locked" in output
+    assert "=== Deployment Results ===" in output
+    # Daemon requests must not leak progress lines to the daemon's own stdout
+    assert capsys.readouterr().out == ''
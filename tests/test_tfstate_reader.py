@@ -0,0 +1,113 @@
+# tests/test_tfstate_reader.py
+
+import json
+
+import pytest
+
+import tfstate_reader
+from tfstate_reader import StateInventory, _JSONStream, iter_resources
+
+
+def _resource(res_type, name, attrs, module=None, mode='managed'):
+    resource = {"mode": mode, "type": res_type, "name": name, "instances": [{"attributes": attrs}]}
+    if module:
+        resource["module"] = module
+    return resource
+
+
+STATE = {
+    "version": 4,
+    "terraform_version": "1.6.0",
+    "serial": 1234567,
+    "lineage": "ünïcödé-lineage-✓",
+    "outputs": {"nested": {"value": [1, 2.5e10, -3, True, None, {"a": "}]"}]}},
+    "resources": [
+        _resource('spacelift_space', 'prod', {
+            "id": "prod", "name": "production", "parent_space_id": "root", "inherit_entities": True
+        }),
+        _resource('spacelift_stack', 'web', {
+            "id": "web-app", "name": "web-app ✓", "labels": ["production", "team:web"], "space_id": "prod"
+        }, module='module.web_app'),
+        _resource('spacelift_stack', 'api', {
+            "id": "api", "name": "api", "labels": ["staging"], "space_id": "root"
+        }),
+        _resource('spacelift_policy', 'approval', {"id": "approval", "name": "Approval", "type": "APPROVAL"}),
+        _resource('spacelift_policy', 'plan', {"id": "plan", "name": "Plan", "type": "PLAN"}),
+        _resource('spacelift_policy_attachment', 'root', {"policy_id": "plan", "space_id": "root"}),
+        _resource('spacelift_policy_attachment', 'prod', {"policy_id": "approval", "space_id": "prod"}),
+        _resource('spacelift_policy_attachment', 'web', {"policy_id": "approval", "stack_id": "web-app"}),
+        _resource('spacelift_stack', 'ignored', {"id": "ignored", "name": "ignored"}, mode='data'),
+    ],
+    "check_results": None
+}
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    path = tmp_path / 'terraform.tfstate'
+    path.write_text(json.dumps(STATE, indent=2, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def _chunks(data: bytes, size: int):
+    return iter([data[i:i + size] for i in range(0, len(data), size)])
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 1 << 20])
+def test_values_split_across_chunk_boundaries(size):
+    data = json.dumps([12345678, -0.5e-3, "ünï✓", {"k": [True, None]}, 9], ensure_ascii=False).encode()
+    stream = _JSONStream(_chunks(data, size))
+    stream.expect('[')
+    values = []
+    while stream.peek() != ']':
+        values.append(stream.value())
+        if stream.peek() == ',':
+            stream.pos += 1
+    assert values == json.loads(data)
+
+
+def test_trailing_number_waits_for_next_chunk():
+    # "123" followed by "45" must decode as one number, not 123
+    stream = _JSONStream(iter([b'123', b'45', b' ']))
+    assert stream.value() == 12345
+
+
+def test_truncated_input_raises():
+    stream = _JSONStream(iter([b'{"a": [1, 2']))
+    with pytest.raises(ValueError):
+        stream.value()
+
+
+@pytest.mark.parametrize('size', [1, 7, 64, 1 << 20])
+def test_iter_resources_matches_json_load(state_path, monkeypatch, size):
+    monkeypatch.setattr(tfstate_reader, 'CHUNK_SIZE', size)
+    assert list(iter_resources(state_path)) == STATE['resources']
+
+
+def test_iter_resources_memory_mapped(state_path, monkeypatch):
+    monkeypatch.setattr(tfstate_reader, 'MMAP_THRESHOLD', 1)
+    monkeypatch.setattr(tfstate_reader, 'CHUNK_SIZE', 5)
+    assert list(iter_resources(state_path)) == STATE['resources']
+
+
+def test_inventory(state_path):
+    inventory = StateInventory.from_state(state_path)
+    assert set(inventory.stacks) == {'web-app', 'api'}
+    assert inventory.stacks['web-app']['module'] == 'module.web_app'
+    assert [s['id'] for s in inventory.stacks_with_label('production')] == ['web-app']
+    # prod inherits from root, so the root attachment applies too
+    assert inventory.effective_policies('web-app') == {'approval', 'plan'}
+    assert inventory.effective_policies('api') == {'plan'}
+
+
+def test_diff(state_path):
+    inventory = StateInventory.from_state(state_path)
+    diff = inventory.diff([
+        {"id": "web-app", "labels": ["production"]},
+        {"id": "unmanaged", "labels": []}
+    ])
+    assert diff == {
+        "missing_in_api": ["api"],
+        "unmanaged_in_api": ["unmanaged"],
+        "label_drift": {"web-app": {"missing": ["team:web"], "unexpected": []}}
+    }
@@ -0,0 +1,119 @@
+# tests/test_token_manager.py
+
+import base64
+import json
+import threading
+import time
+
+import pytest
+
+from token_manager import TokenCache, TokenManager, decode_jwt_expiry
+
+
+def make_jwt(exp: float, nonce: int = 0) -> str:
+    def encode(obj):
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).decode().rstrip('=')
+    return f"{encode({'alg': 'none'})}.{encode({'exp': exp, 'n': nonce})}.sig"
+
+
+class CountingFetch:
+    def __init__(self, ttl=3600, delay=0.0):
+        self.ttl = ttl
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            nonce = self.calls
+        time.sleep(self.delay)
+        return make_jwt(time.time() + self.ttl, nonce)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TokenCache(str(tmp_path / 'token.json'), identity='key-id@endpoint')
+
+
+def test_decode_jwt_expiry():
+    assert decode_jwt_expiry(make_jwt(1234567890)) == 1234567890.0
+    assert decode_jwt_expiry('not-a-jwt') is None
+
+
+def test_concurrent_callers_fetch_once():
+    fetch = CountingFetch(delay=0.05)
+    manager = TokenManager(fetch)
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(manager.get_token())) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    manager.stop()
+
+    assert fetch.calls == 1
+    assert len(set(tokens)) == 1
+
+
+def test_cache_shared_between_managers(cache):
+    fetch = CountingFetch()
+    first, second = TokenManager(fetch, cache=cache), TokenManager(fetch, cache=cache)
+    assert first.get_token() == second.get_token()
+    assert fetch.calls == 1
+    first.stop()
+    second.stop()
+
+
+def test_invalidate_skips_rejected_cached_token(cache):
+    fetch = CountingFetch()
+    manager = TokenManager(fetch, cache=cache)
+    revoked = manager.get_token()
+
+    manager.invalidate(revoked)
+    fresh = manager.get_token()
+    manager.stop()
+
+    assert fresh != revoked
+    assert fetch.calls == 2
+    assert cache.load()[0] == fresh
+
+
+def test_invalidate_keeps_token_refreshed_meanwhile():
+    fetch = CountingFetch()
+    manager = TokenManager(fetch)
+    token = manager.get_token()
+
+    manager.invalidate('some-older-token')
+    assert manager.get_token() == token
+    assert fetch.calls == 1
+    manager.stop()
+
+
+def test_short_lived_token_is_not_refreshed_in_a_loop():
+    # Lifetime below refresh_margin: refresh half-way through, not continuously
+    fetch = CountingFetch(ttl=120)
+    manager = TokenManager(fetch)
+    manager.get_token()
+    time.sleep(0.5)
+    manager.stop()
+    assert fetch.calls == 1
+
+
+def test_refreshes_are_spaced_by_min_interval():
+    fetch = CountingFetch(ttl=0.2)
+    manager = TokenManager(fetch, min_refresh_interval=0.25)
+    manager.get_token()
+    time.sleep(0.6)
+    manager.stop()
+    assert 2 <= fetch.calls <= 4
+
+
+def test_skewed_clock_does_not_refetch_on_every_call():
+    # exp already in the past by our clock, but the token was just minted
+    fetch = CountingFetch(ttl=-60)
+    manager = TokenManager(fetch)
+    for _ in range(100):
+        manager.get_token()
+    manager.stop()
+    assert fetch.calls == 1